@@ -1,6 +1,7 @@
 import argparse
 from enum import Enum
 
+from app.batch_analysis import BatchAnalysisApp
 from app.live_analysis import LiveAnalysisApp
 from app.video_analysis import VideoAnalysisApp
 
@@ -8,6 +9,7 @@ from app.video_analysis import VideoAnalysisApp
 class AppTypes(Enum):
     LIVE = LiveAnalysisApp
     VIDEO = VideoAnalysisApp
+    BATCH = BatchAnalysisApp
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -17,14 +19,14 @@ def parse_arguments() -> argparse.Namespace:
     required.add_argument(
         "-a",
         "--app",
-        choices=["LIVE", "VIDEO"],
-        help="Application type (Live, Video)",
+        choices=["LIVE", "VIDEO", "BATCH"],
+        help="Application type (Live, Video, Batch)",
         required=True,
     )
     required.add_argument(
         "-i",
         "--input",
-        help="Camera numer or path to video",
+        help="Camera numer, path to video or directory/glob of videos (BATCH)",
         type=lambda x: int(x) if x.isdigit() else x,
         required=True,
     )
@@ -44,17 +46,133 @@ def parse_arguments() -> argparse.Namespace:
         help="If results should be saved or not",
         action="store_true",
     )
+    optional.add_argument(
+        "--pipelined",
+        help="Run video decoding, pose estimation and features extraction "
+        "in separate threads (VIDEO only)",
+        action="store_true",
+    )
+    optional.add_argument(
+        "--workers",
+        help="Number of worker processes: parts of the video analyzed in parallel "
+        "(VIDEO) or videos analyzed in parallel (BATCH, defaults to CPU count)",
+        type=int,
+    )
+    optional.add_argument(
+        "--cache_dir",
+        help="Directory of cached pose estimation results reused for the same "
+        "video (VIDEO, BATCH)",
+    )
+    optional.add_argument(
+        "--save_format",
+        help="Format of saved results: CSV files per repetition or a single "
+        "binary features file (VIDEO, BATCH)",
+        choices=["csv", "npz"],
+        default="csv",
+    )
+    optional.add_argument(
+        "--target_fps",
+        help="Maximum number of frames analyzed per second, frames in between are "
+        "dropped (LIVE only)",
+        type=float,
+    )
+    optional.add_argument(
+        "--max_latency",
+        help="Maximum age in seconds of an analyzed frame, older frames are "
+        "dropped (LIVE only)",
+        type=float,
+    )
+    optional.add_argument(
+        "--visualization",
+        help="3D figure next to the video, overlay drawn on the video or no "
+        "window at all (LIVE only)",
+        choices=["figure", "overlay", "headless"],
+        default="figure",
+    )
+    optional.add_argument(
+        "--inference_size",
+        help="Crop frames to the person found in the previous frame and downscale "
+        "the longer side to this number of pixels before pose estimation",
+        type=int,
+    )
+    optional.add_argument(
+        "--frame_stride",
+        help="Estimate pose only on every n-th frame while motion is slow, "
+        "on every frame around peaks and valleys of the movement, interpolating "
+        "the skipped ones (VIDEO, BATCH)",
+        type=int,
+        default=1,
+    )
+    optional.add_argument(
+        "--smoothing_cutoff",
+        help="Cutoff frequency in Hz of temporal joints smoothing: minimum cutoff "
+        "of One Euro filter (LIVE) or of zero-phase low-pass filter (VIDEO, BATCH)",
+        type=float,
+    )
+    optional.add_argument(
+        "--pose_model",
+        help="Pose estimation model from configs/pose_estimators.yaml",
+        default="mediapipe",
+    )
+    optional.add_argument(
+        "--model_complexity",
+        help="Complexity of the pose estimation model, lower is faster and less "
+        "accurate (defaults to the model settings)",
+        choices=[0, 1, 2],
+        type=int,
+    )
     return parser.parse_args()
 
 
+def get_app_options(args: argparse.Namespace) -> dict:
+    model_options = {
+        "pose_model": args.pose_model,
+        "model_complexity": args.model_complexity,
+    }
+    if args.app == AppTypes.VIDEO.name:
+        return {
+            **model_options,
+            "pipelined": args.pipelined,
+            "workers": args.workers or 1,
+            "cache_dir": args.cache_dir,
+            "save_format": args.save_format,
+            "inference_size": args.inference_size,
+            "frame_stride": args.frame_stride,
+            "smoothing_cutoff": args.smoothing_cutoff,
+        }
+    if args.app == AppTypes.BATCH.name:
+        return {
+            **model_options,
+            "workers": args.workers,
+            "cache_dir": args.cache_dir,
+            "save_format": args.save_format,
+            "inference_size": args.inference_size,
+            "frame_stride": args.frame_stride,
+            "smoothing_cutoff": args.smoothing_cutoff,
+        }
+    if args.app == AppTypes.LIVE.name:
+        return {
+            **model_options,
+            "target_fps": args.target_fps,
+            "max_latency": args.max_latency,
+            "visualization": args.visualization,
+            "inference_size": args.inference_size,
+            "smoothing_cutoff": args.smoothing_cutoff,
+        }
+    return {}
+
+
 def main():
     args = parse_arguments()
     try:
         app_type = AppTypes[args.app]
-        app = app_type.value(args.exercise)
+        app = app_type.value(args.exercise, **get_app_options(args))
     except KeyError:
         raise ValueError("Invalid app type")
-    app.run(args.input, args.output, args.save_results)
+    try:
+        app.run(args.input, args.output, args.save_results)
+    finally:
+        app.close()
 
 
 if __name__ == "__main__":
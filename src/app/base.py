@@ -1,36 +1,150 @@
+import glob
 import logging
+import os
 from abc import ABC, abstractmethod
 
-import mediapipe as mp
+import pandas as pd
 import yaml
 
+from models.segment import Segment
+from processors.segments_processor import SegmentsProcessor
+from utils.exercise_config import (
+    ExerciseConfig,
+    compile_exercise_config,
+    compile_pose_model_config,
+)
+from utils.feature_store import FEATURE_STORE_FILE, load_features, save_features
+from utils.pose_estimators import POSE_ESTIMATOR_POOL
+from utils.reference_index import REFERENCE_INDEX_FILE, ReferenceIndex
+
 POSE_ESTIMATION_CONFIG = "configs/pose_estimators.yaml"
 PHASES_TABLE = "configs/exercises_table.yaml"
 POSE_ESTIMATION_MODEL_NAME = "mediapipe"
 OUTPUT_PATH_FIELD = "output_path"
+PATH_TO_REFERENCE = "data/{exercise}/features/reference"
 
 
 class App(ABC):
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        pose_model: str = POSE_ESTIMATION_MODEL_NAME,
+        model_complexity: int | None = None,
+    ) -> None:
         super().__init__()
         self.logger = logging.getLogger(__name__)
 
-        self._mp_pose = mp.solutions.pose
-        self._pose_estimation_model = self._mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-            model_complexity=2,
-        )
-
         self._pose_estimation_config = self.__load_yaml_file(POSE_ESTIMATION_CONFIG)
         self._exercise_table = self.__load_yaml_file(PHASES_TABLE)
 
+        self.pose_model_config = compile_pose_model_config(
+            self._pose_estimation_config, pose_model
+        )
+        self.pose_model = pose_model
+        self.pose_estimation_settings = dict(self.pose_model_config.settings)
+        if model_complexity is not None:
+            self.pose_estimation_settings["model_complexity"] = model_complexity
+        self.__pose_estimation_model = None
+
+    @property
+    def _pose_estimation_model(self):
+        """
+        Pose estimator borrowed from the process-wide pool on first use
+        """
+        if self.__pose_estimation_model is None:
+            self.__pose_estimation_model = POSE_ESTIMATOR_POOL.acquire(
+                self.pose_model, self.pose_estimation_settings
+            )
+        return self.__pose_estimation_model
+
+    def close(self) -> None:
+        """
+        Return pose estimator to the pool, so the next analysis reuses it warm
+        """
+        if self.__pose_estimation_model is not None:
+            POSE_ESTIMATOR_POOL.release(
+                self.pose_model,
+                self.pose_estimation_settings,
+                self.__pose_estimation_model,
+            )
+            self.__pose_estimation_model = None
+
     @abstractmethod
     def run(self, input_source: str, output: str, save_results: bool) -> None:
         """
         Run app's flow
         """
 
+    def _compile_exercise_config(self, exercise: str) -> ExerciseConfig:
+        """
+        Exercise configuration validated against angles of the pose model, so
+        misconfigured exercises fail before any video is opened
+        """
+        return compile_exercise_config(
+            self._exercise_table, exercise, self.pose_model_config
+        )
+
+    def _load_references(
+        self, exercise: str, angle_columns: list[str]
+    ) -> list[ReferenceIndex]:
+        """
+        Library of reference repetitions: the `reference` directory of exercise
+        features followed by every other `reference*` directory
+        """
+        paths_to_references = sorted(
+            path
+            for path in glob.glob(PATH_TO_REFERENCE.format(exercise=exercise) + "*")
+            if os.path.isdir(path)
+        )
+        if not paths_to_references:
+            raise FileNotFoundError(f"No reference found for exercise: {exercise}")
+        return [
+            self._load_reference_index(path_to_reference, angle_columns)
+            for path_to_reference in paths_to_references
+        ]
+
+    @staticmethod
+    def _load_reference(path_to_reference: str) -> Segment:
+        binary_reference = os.path.join(path_to_reference, FEATURE_STORE_FILE)
+        if os.path.exists(binary_reference):
+            return SegmentsProcessor.from_arrays(load_features(binary_reference))[0]
+
+        reference_joints = pd.read_csv(os.path.join(path_to_reference, "joints.csv"))
+        reference_angles = pd.read_csv(os.path.join(path_to_reference, "angles.csv"))
+        return SegmentsProcessor.from_df((reference_joints, reference_angles))
+
+    def _load_reference_index(
+        self, path_to_reference: str, angle_columns: list[str]
+    ) -> ReferenceIndex:
+        """
+        Memory-mapped reference index, built from the reference files and saved
+        next to them when missing or outdated
+        """
+        index_path = os.path.join(path_to_reference, REFERENCE_INDEX_FILE)
+        if self.__is_up_to_date(index_path, path_to_reference):
+            reference_index = ReferenceIndex.from_arrays(load_features(index_path))
+            if reference_index.angle_columns == angle_columns:
+                return reference_index
+
+        reference_index = ReferenceIndex.build(
+            self._load_reference(path_to_reference), angle_columns
+        )
+        try:
+            save_features(index_path, reference_index.to_arrays())
+        except OSError as error:
+            self.logger.warning("Reference index can't be saved: %s", error)
+        return reference_index
+
+    @staticmethod
+    def __is_up_to_date(index_path: str, path_to_reference: str) -> bool:
+        if not os.path.exists(index_path):
+            return False
+        index_mtime = os.path.getmtime(index_path)
+        return all(
+            os.path.getmtime(os.path.join(path_to_reference, file_name)) <= index_mtime
+            for file_name in os.listdir(path_to_reference)
+            if file_name != REFERENCE_INDEX_FILE
+        )
+
     def __load_yaml_file(self, file_path: str) -> dict:
         try:
             with open(file_path, "r") as file:
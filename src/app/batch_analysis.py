@@ -0,0 +1,165 @@
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from app.base import POSE_ESTIMATION_MODEL_NAME, App
+from app.video_analysis import VideoAnalysisApp
+from utils.pose_estimators import POSE_ESTIMATOR_POOL
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+SUMMARY_FILE = "summary.csv"
+
+_worker_app: VideoAnalysisApp | None = None
+
+
+def _initialize_worker(
+    exercise: str,
+    cache_dir: str | None,
+    save_format: str,
+    inference_size: int | None,
+    frame_stride: int,
+    smoothing_cutoff: float | None,
+    pose_model: str,
+    model_complexity: int | None,
+) -> None:
+    global _worker_app  # pylint: disable=global-statement
+    _worker_app = VideoAnalysisApp(
+        exercise,
+        cache_dir=cache_dir,
+        save_format=save_format,
+        inference_size=inference_size,
+        frame_stride=frame_stride,
+        smoothing_cutoff=smoothing_cutoff,
+        pose_model=pose_model,
+        model_complexity=model_complexity,
+    )
+    POSE_ESTIMATOR_POOL.warm_up(
+        _worker_app.pose_model, _worker_app.pose_estimation_settings
+    )
+
+
+def _analyze_video(video_path: str, output: str, save_results: bool) -> dict:
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    summary = {"video": video_path, "status": "failed", "repetitions": 0}
+    try:
+        processors = _worker_app.analyze(video_path)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        _worker_app.logger.critical("Analysis of %s failed: %s", video_path, error)
+        return {**summary, "feedback": str(error)}
+    finally:
+        # Returning the estimator to the pool resets its tracking state, so the
+        # next video doesn't start from landmarks of this one
+        _worker_app.close()
+    if processors is None:
+        return {**summary, "feedback": "Error on opening video file"}
+
+    segments_processor, results_processor, mistakes_processor = processors
+    if save_results:
+        video_output = os.path.join(output, video_name)
+        _worker_app.save_results(
+            video_output, segments_processor, results_processor, mistakes_processor
+        )
+        summary["output"] = video_output
+
+    feedback = {
+        mistake.fix_info
+        for segment_mistakes in mistakes_processor.data
+        for mistake in segment_mistakes
+    }
+    return {
+        **summary,
+        "status": "ok",
+        "repetitions": len(segments_processor.data),
+        "feedback": ", ".join(sorted(feedback)),
+    }
+
+
+class BatchAnalysisApp(App):
+    """
+    Whole video analysis of many videos in a pool of worker processes.
+    """
+
+    def __init__(
+        self,
+        exercise: str,
+        workers: int | None = None,
+        cache_dir: str | None = None,
+        save_format: str = "csv",
+        inference_size: int | None = None,
+        frame_stride: int = 1,
+        smoothing_cutoff: float | None = None,
+        pose_model: str = POSE_ESTIMATION_MODEL_NAME,
+        model_complexity: int | None = None,
+    ) -> None:
+        super().__init__(pose_model, model_complexity)
+        self.exercise = exercise
+        self._load_references(
+            exercise,
+            self._compile_exercise_config(exercise).comparison_angle_columns,
+        )
+        self.workers = workers or os.cpu_count()
+        self.cache_dir = cache_dir
+        self.save_format = save_format
+        self.inference_size = inference_size
+        self.frame_stride = frame_stride
+        self.smoothing_cutoff = smoothing_cutoff
+        self.model_complexity = model_complexity
+
+    def run(self, input_source: str, output: str, save_results: bool) -> None:
+        video_paths = self.__find_videos(input_source)
+        if not video_paths:
+            self.logger.critical("❌ No videos found in: %s ❌", input_source)
+            return
+
+        workers = min(self.workers, len(video_paths))
+        self.logger.info(
+            "Analyzing %s videos with %s workers... 🎬", len(video_paths), workers
+        )
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+            initargs=(
+                self.exercise,
+                self.cache_dir,
+                self.save_format,
+                self.inference_size,
+                self.frame_stride,
+                self.smoothing_cutoff,
+                self.pose_model,
+                self.model_complexity,
+            ),
+        ) as executor:
+            summaries = list(
+                executor.map(
+                    _analyze_video,
+                    video_paths,
+                    [output] * len(video_paths),
+                    [save_results] * len(video_paths),
+                )
+            )
+
+        os.makedirs(output, exist_ok=True)
+        summary_path = os.path.join(output, SUMMARY_FILE)
+        pd.DataFrame(summaries).to_csv(summary_path, index=False)
+
+        failed = sum(summary["status"] != "ok" for summary in summaries)
+        self.logger.info(
+            "Batch analysis complete! ✅ %s videos analyzed, %s failed. Summary: %s",
+            len(summaries) - failed,
+            failed,
+            summary_path,
+        )
+
+    @staticmethod
+    def __find_videos(input_source: str) -> list[str]:
+        if os.path.isdir(input_source):
+            input_source = os.path.join(input_source, "*")
+        return sorted(
+            path
+            for path in glob.glob(input_source)
+            if path.lower().endswith(VIDEO_EXTENSIONS)
+        )
@@ -3,86 +3,202 @@ import cv2
 from app.base import POSE_ESTIMATION_MODEL_NAME, App
 from processors.angles_processor import AnglesProcessor
 from processors.joints_processor import JointsProcessor
+from processors.mistakes_processor import MistakesProcessor
+from processors.results_processor import ResultsProcessor
+from processors.segments_processor import SegmentsProcessor
+from utils.feedback_worker import FeedbackWorker
+from utils.frame_grabber import FrameGrabber
+from utils.online_segmenter import OnlineSegmenter
 from utils.repetitions_counter import RepetitionsCounter
+from utils.roi_tracker import RoiTracker
+from utils.temporal_filters import OneEuroFilter
 from utils.visualizer import Visualizer
 
+DEFAULT_FPS = 30
+
 
 class LiveAnalysisApp(App):
     """
     Real-time angles visualization and reps countning.
     """
 
-    def __init__(self, exercise: str) -> None:
-        super().__init__()
-        self.exercise_phases = self._exercise_table[exercise]
-
-        model_config_data = self._pose_estimation_config[POSE_ESTIMATION_MODEL_NAME]
-        self.angle_names = model_config_data["angles"]
-        self.joint_names = model_config_data["joints"]
-        self.connections = model_config_data["connections"]["torso"]
+    def __init__(
+        self,
+        exercise: str,
+        target_fps: float | None = None,
+        max_latency: float | None = None,
+        visualization: str = "figure",
+        inference_size: int | None = None,
+        smoothing_cutoff: float | None = None,
+        pose_model: str = POSE_ESTIMATION_MODEL_NAME,
+        model_complexity: int | None = None,
+    ) -> None:
+        super().__init__(pose_model, model_complexity)
+        self.inference_size = inference_size
+        self.smoothing_cutoff = smoothing_cutoff
+        self.visualization = visualization
+        self.target_fps = target_fps
+        self.max_latency = max_latency
+        self.exercise = exercise
+        self.exercise_config = self._compile_exercise_config(exercise)
+        self.segment_angles = list(self.exercise_config.segment_angles)
+        self.comparison_features = list(self.exercise_config.comparison_features)
+        self.mistakes_table = self.exercise_config.mistakes_table
+        self.dtw_options = self.exercise_config.dtw_options
+
+        self.angle_names = self.pose_model_config.angle_names
+        self.joint_names = self.pose_model_config.joint_names
+        self.connections = self.pose_model_config.connections
+
+        self.references = self._load_references(
+            exercise, self.exercise_config.comparison_angle_columns
+        )
 
     def run(self, input_source: str, output: str, save_results: bool) -> None:
         joints_processor = JointsProcessor(self.joint_names)
-        angles_processor = AnglesProcessor(self.angle_names)
+        angles_processor = AnglesProcessor(
+            self.angle_names,
+            list(self.joint_names),
+            self.pose_model_config.angle_joint_idxs,
+        )
 
-        visualizer = Visualizer(self.connections)
-        repetitions_counter = RepetitionsCounter(self.exercise_phases)
+        visualizer = Visualizer(self.connections, self.visualization)
+        show_window = self.visualization != "headless"
+        roi_tracker = RoiTracker(self.inference_size) if self.inference_size else None
 
         cap = cv2.VideoCapture(input_source)
-        cv2.namedWindow("Mediapipe", cv2.WINDOW_AUTOSIZE)
-        cv2.moveWindow("Mediapipe", 0, -100)
+        fps = int(cap.get(cv2.CAP_PROP_FPS)) or DEFAULT_FPS
+        segments_processor = SegmentsProcessor(fps, self.segment_angles)
+        repetitions_counter = RepetitionsCounter(self.exercise_config)
+        joints_filter = (
+            OneEuroFilter(fps, self.smoothing_cutoff) if self.smoothing_cutoff else None
+        )
+        online_segmenter = OnlineSegmenter(
+            fps, self.exercise_config.segmentation_columns
+        )
+        feedback_worker = FeedbackWorker(
+            ResultsProcessor(
+                self.references, self.comparison_features, **self.dtw_options
+            ),
+            MistakesProcessor(self.mistakes_table, self.exercise),
+        )
+        feedback_info = []
+        if show_window:
+            cv2.namedWindow("Mediapipe", cv2.WINDOW_AUTOSIZE)
+            cv2.moveWindow("Mediapipe", 0, -100)
 
         if not cap.isOpened():
             self.logger.critical("❌ Error on opening video stream or file! ❌")
             return
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            results = self._pose_estimation_model.process(frame)
+        frame_grabber = FrameGrabber(
+            cap,
+            realtime_fps=fps if isinstance(input_source, str) else None,
+            target_fps=self.target_fps,
+            max_latency=self.max_latency,
+        )
+        while captured := frame_grabber.read():
+            frame_number, capture_time, frame = captured
+            if roi_tracker:
+                results = roi_tracker.process(self._pose_estimation_model, frame)
+            else:
+                results = self._pose_estimation_model.process(frame)
             landmarks = results.pose_landmarks
             world_landmards = results.pose_world_landmarks
 
             if world_landmards:
                 # Joints processing
-                frame_number = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
                 JointsProcessor.current_processing_frame = frame_number
 
                 joints = joints_processor.process(world_landmards)
                 joints_processor.update(joints)
+                if joints_filter:
+                    joints_filter.process(
+                        frame_number, joints_processor.data.values[-1, :, :3]
+                    )
+                    joints = joints_processor.data.to_joints(-1)
 
                 # Angle processing
                 angles = angles_processor.process(joints)
                 angles_processor.update(angles)
 
                 # Exercise state
-                progress = repetitions_counter.process(angles)
-                repetitions_counter.update(progress)
+                progress = repetitions_counter.process(angles_processor.data.values[-1])
+                repetition = repetitions_counter.update(
+                    progress, frame_number, capture_time
+                )
+                if repetition:
+                    self.logger.info(
+                        "Repetition %s counted: tempo %s s, %.1f s under tension ⏱️",
+                        repetition.rep,
+                        repetition.tempo,
+                        repetition.time_under_tension,
+                    )
+
+                # Segmentation
+                segments = online_segmenter.process(
+                    (joints_processor.data, angles_processor.data)
+                )
+                for segment in segments:
+                    self.logger.info(
+                        "Repetition %s done: frames [%s - %s] 🏁",
+                        segment.rep,
+                        segment.start_frame,
+                        segment.finish_frame,
+                    )
+                    feedback_worker.submit(segment)
+                segments_processor.update(segments_processor.data + segments)
+
+                # Feedback
+                for rep, mistakes in feedback_worker.poll():
+                    feedback_info = sorted(
+                        set(mistake.fix_info for mistake in mistakes)
+                    )
+                    self.logger.info(
+                        "Feedback for repetition %s: %s", rep, ", ".join(feedback_info)
+                    )
 
                 # Updating window
-                visualizer.update_figure(
+                visualizer.update(
+                    frame,
+                    landmarks,
                     joints,
                     angles,
                     progress,
                     repetitions_counter.repetitions_count,
                     repetitions_counter.state,
-                )
-                visualizer.draw_landmarks(
-                    frame, landmarks, self._mp_pose.POSE_CONNECTIONS
+                    feedback_info,
                 )
 
-            cv2.imshow("Mediapipe", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
+            if show_window:
+                cv2.imshow("Mediapipe", frame)
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
 
+        frame_grabber.close()
         cap.release()
-        cv2.destroyAllWindows()
+        if show_window:
+            cv2.destroyAllWindows()
+        feedback_worker.close()
+        self.logger.info(
+            "Captured %s frames 🎥, dropped %s frames behind the newest one "
+            "and %s frames older than max latency",
+            frame_grabber.captured_frames,
+            frame_grabber.dropped_frames,
+            frame_grabber.stale_frames,
+        )
+        if feedback_worker.failed_repetitions:
+            self.logger.warning(
+                "Repetitions %s couldn't be compared, saved without results ⚠️",
+                feedback_worker.failed_repetitions,
+            )
 
         if save_results:
             try:
                 joints_processor.save(output)
                 angles_processor.save(output)
+                segments_processor.save(output)
+                feedback_worker.results_processor.save(output)
+                feedback_worker.mistakes_processor.save(output)
             except ValueError as error:
                 self.logger.critical("Error on trying to save results: %s", error)
@@ -1,18 +1,28 @@
 import os
+from typing import Any, Callable, Iterator
 
 import cv2
-import pandas as pd
+import numpy as np
 
 from app.base import POSE_ESTIMATION_MODEL_NAME, App
-from models.angle import Angle
-from models.joint import Joint
+from models.angle import AnglesTable
+from models.joint import JointsTable
 from processors.angles_processor import AnglesProcessor
 from processors.joints_processor import JointsProcessor
 from processors.mistakes_processor import MistakesProcessor
 from processors.results_processor import ResultsProcessor
 from processors.segments_processor import SegmentsProcessor
+from utils.adaptive_sampling import AdaptiveSampler
+from utils.feature_store import FEATURE_STORE_FILE, save_features
+from utils.landmarks_cache import LandmarksCache
+from utils.missing_data import FrameClock, fill_missing, get_max_gap
+from utils.pipeline import DEFAULT_QUEUE_SIZE, Pipeline
+from utils.pose_estimators import POSE_ESTIMATOR_POOL
+from utils.roi_tracker import RoiTracker
+from utils.sharded_extraction import extract_sharded
+from utils.temporal_filters import filter_zero_phase
 
-PATH_TO_REFERENCE = "data/{exercise}/features/reference"
+SAVE_FORMATS = ("csv", "npz")
 
 
 class VideoAnalysisApp(App):
@@ -20,45 +30,90 @@ class VideoAnalysisApp(App):
     More advanced whole video analysis.
     """
 
-    def __init__(self, exercise: str) -> None:
-        super().__init__()
+    def __init__(
+        self,
+        exercise: str,
+        pipelined: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        workers: int = 1,
+        cache_dir: str | None = None,
+        save_format: str = "csv",
+        inference_size: int | None = None,
+        frame_stride: int = 1,
+        smoothing_cutoff: float | None = None,
+        pose_model: str = POSE_ESTIMATION_MODEL_NAME,
+        model_complexity: int | None = None,
+    ) -> None:
+        super().__init__(pose_model, model_complexity)
+        if save_format not in SAVE_FORMATS:
+            raise ValueError(f"Unknown save format: {save_format}")
         self.exercise = exercise
-        self.comparison_features = self._exercise_table[exercise]["comparison_features"]
-        self.segment_angles = self._exercise_table[exercise]["segment_angles"]
-        self.mistakes_table = self._exercise_table[exercise]["mistakes_table"]
-
-        model_config_data = self._pose_estimation_config[POSE_ESTIMATION_MODEL_NAME]
-        self.angle_names = model_config_data["angles"]
-        self.joint_names = model_config_data["joints"]
-        self.connections = model_config_data["connections"]["torso"]
-
-        path_to_reference = os.path.join(PATH_TO_REFERENCE.format(exercise=exercise))
-        reference_joints = pd.read_csv(os.path.join(path_to_reference, "joints.csv"))
-        reference_angles = pd.read_csv(os.path.join(path_to_reference, "angles.csv"))
-        self.reference_segment = SegmentsProcessor.from_df(
-            (reference_joints, reference_angles)
+        self.save_format = save_format
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.workers = workers
+        self.inference_size = inference_size
+        self.frame_stride = frame_stride
+        self.smoothing_cutoff = smoothing_cutoff
+        self._roi_tracker: RoiTracker | None = None
+        self.exercise_config = self._compile_exercise_config(exercise)
+        self.comparison_features = list(self.exercise_config.comparison_features)
+        self.segment_angles = list(self.exercise_config.segment_angles)
+        self.mistakes_table = self.exercise_config.mistakes_table
+        self.dtw_options = self.exercise_config.dtw_options
+
+        self.angle_names = self.pose_model_config.angle_names
+        self.joint_names = self.pose_model_config.joint_names
+        self.connections = self.pose_model_config.connections
+
+        self.landmarks_cache = None
+        if cache_dir:
+            model_settings = {
+                "model": self.pose_model,
+                "joints": list(self.joint_names),
+                **self.pose_estimation_settings,
+            }
+            if inference_size:
+                model_settings["inference_size"] = inference_size
+            if frame_stride > 1:
+                model_settings["frame_stride"] = frame_stride
+            self.landmarks_cache = LandmarksCache(model_settings, cache_dir)
+
+        self.references = self._load_references(
+            exercise, self.exercise_config.comparison_angle_columns
         )
 
     def run(self, input_source: str, output: str, save_results: bool) -> None:
+        processors = self.analyze(input_source)
+        if processors and save_results:
+            self.save_results(output, *processors)
+
+    def analyze(
+        self, input_source: str
+    ) -> tuple[SegmentsProcessor, ResultsProcessor, MistakesProcessor] | None:
         cap = cv2.VideoCapture(input_source)
         if not cap.isOpened():
             self.logger.critical("❌ Error on opening video stream or file! ❌")
-            return
+            return None
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         video_length = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        joint_data, angles_data = self.extract_features(cap)
+        joint_data, angles_data = self.__get_features(
+            input_source, cap, video_length, fps
+        )
 
-        segments_processor = SegmentsProcessor(fps, self.segment_angles)
+        segments_processor = SegmentsProcessor(
+            fps, self.segment_angles, max_gap=get_max_gap(fps, self.frame_stride)
+        )
         mistakes_proecssor = MistakesProcessor(self.mistakes_table, self.exercise)
         results_processor = ResultsProcessor(
-            self.reference_segment, self.comparison_features
+            self.references, self.comparison_features, **self.dtw_options
         )
 
         self.logger.info(
             "Analyzed %s frames 🖼️, extracted %s joint features 💪 and %s angle features 📐",
             video_length,
-            len(joint_data),
-            len(angles_data),
+            joint_data.visibility.size,
+            angles_data.values.size,
         )
         segments = segments_processor.process(data=(joint_data, angles_data))
         segments_processor.update(segments)
@@ -78,6 +133,11 @@ class VideoAnalysisApp(App):
             )
             results = results_processor.process(segment)
             results_processor.update(results)
+            if not results:
+                self.logger.warning(
+                    "Repetition %s is too far from the reference, skipping it ⏭️",
+                    segment.rep,
+                )
 
             feedback = mistakes_proecssor.process(results)
             mistakes_proecssor.update(feedback)
@@ -86,38 +146,187 @@ class VideoAnalysisApp(App):
             self.logger.info("Feedback: %s", ", ".join(unique_feedback))
 
         self.logger.info("Analysis complete! ✅")
-        if save_results:
-            self.save_results(
-                output, segments_processor, results_processor, mistakes_proecssor
-            )
+        return segments_processor, results_processor, mistakes_proecssor
+
+    def __get_features(
+        self, input_source: str, cap: cv2.VideoCapture, video_length: int, fps: int
+    ) -> tuple[JointsTable, AnglesTable]:
+        cache_key = None
+        if self.landmarks_cache and isinstance(input_source, str):
+            cache_key = self.landmarks_cache.key(input_source)
+            joint_data = self.landmarks_cache.load(cache_key)
+            if joint_data is not None:
+                cap.release()
+                self.logger.info("Loaded joints from cache 💾")
+                return self.__calculate_features(joint_data, fps)
+
+        if self.workers > 1 and isinstance(input_source, str):
+            cap.release()
+            joint_data = self.extract_features_sharded(input_source, video_length)
+        else:
+            joint_data = self.extract_features(cap, fps)
 
-    def extract_features(
-        self, cap: cv2.VideoCapture
-    ) -> tuple[list[Joint], list[Angle]]:
+        if cache_key:
+            self.landmarks_cache.save(cache_key, joint_data)
+        return self.__calculate_features(joint_data, fps)
+
+    def extract_features(self, cap: cv2.VideoCapture, fps: int) -> JointsTable:
         joints_processor = JointsProcessor(self.joint_names)
-        angles_processor = AnglesProcessor(self.angle_names)
+        if self.inference_size:
+            self._roi_tracker = RoiTracker(self.inference_size)
 
         self.logger.info("Starting features extraction from video... 🎬")
+        frames = self.__read_frames(cap)
+        if self.frame_stride > 1:
+            if self.pipelined:
+                frames = Pipeline(self.queue_size).source(frames)
+            landmarks = self.__estimate_pose_adaptively(frames, fps)
+        elif self.pipelined:
+            landmarks = (
+                Pipeline(self.queue_size).source(frames).stage(self.__estimate_pose)
+            )
+        else:
+            landmarks = map(self.__estimate_pose, frames)
+
+        for frame_number, world_landmards in landmarks:
+            if world_landmards:
+                JointsProcessor.current_processing_frame = frame_number
+
+                joints = joints_processor.process(world_landmards)
+                joints_processor.update(joints)
+        cap.release()
+
+        return joints_processor.data
+
+    def extract_features_sharded(
+        self, video_path: str, video_length: int
+    ) -> JointsTable:
+        self.logger.info(
+            "Starting features extraction from video in %s processes... 🎬",
+            self.workers,
+        )
+        return extract_sharded(
+            video_path,
+            # Read-only mappings of the compiled config can't be pickled
+            dict(self.joint_names),
+            video_length,
+            self.workers,
+            self.pose_model,
+            self.pose_estimation_settings,
+            inference_size=self.inference_size,
+        )
+
+    def __calculate_features(
+        self, joints: JointsTable, fps: int
+    ) -> tuple[JointsTable, AnglesTable]:
+        joints = fill_missing(joints, get_max_gap(fps, self.frame_stride))
+        self.logger.info(
+            "Pose fully visible in %s of %s frames, short gaps interpolated 🩹",
+            np.count_nonzero(joints.valid),
+            len(joints),
+        )
+        if self.smoothing_cutoff:
+            joints = filter_zero_phase(joints, fps, self.smoothing_cutoff)
+
+        angles_processor = AnglesProcessor(
+            self.angle_names,
+            list(self.joint_names),
+            self.pose_model_config.angle_joint_idxs,
+        )
+        if joints:
+            angles = angles_processor.process_frames(joints)
+            angles_processor.update(angles)
+        return joints, angles_processor.data
+
+    @staticmethod
+    def __read_frames(cap: cv2.VideoCapture) -> Iterator[tuple[int, Any]]:
+        frame_clock = FrameClock(cap)
         while cap.isOpened():
             ret, frame = cap.read()
             if not ret:
                 break
+            yield frame_clock.frame_number(), frame
 
-            results = self._pose_estimation_model.process(frame)
-            world_landmards = results.pose_world_landmarks
+    def __estimate_pose(self, data: tuple[int, Any]) -> tuple[int, Any]:
+        return self.__estimate_pose_with(
+            self._pose_estimation_model, self._roi_tracker, data
+        )
 
-            if world_landmards:
-                frame_number = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                JointsProcessor.current_processing_frame = frame_number
+    @staticmethod
+    def __estimate_pose_with(
+        pose_estimation_model: Any,
+        roi_tracker: RoiTracker | None,
+        data: tuple[int, Any],
+    ) -> tuple[int, Any]:
+        frame_number, frame = data
+        if roi_tracker:
+            results = roi_tracker.process(pose_estimation_model, frame)
+        else:
+            results = pose_estimation_model.process(frame)
+        return frame_number, results.pose_world_landmarks
 
-                joints = joints_processor.process(world_landmards)
-                joints_processor.update(joints)
+    def __estimate_pose_adaptively(
+        self, frames: Iterator[tuple[int, Any]], fps: int
+    ) -> Iterator[tuple[int, Any]]:
+        """
+        Buffered frames precede frames already processed, so they are backfilled by
+        a separate estimator and ROI tracker. Each tracker still receives frames in
+        increasing order, as tracking and landmarks smoothing depend on it.
+        """
+        with POSE_ESTIMATOR_POOL.estimator(
+            self.pose_model, self.pose_estimation_settings
+        ) as backfill_model:
+            backfill_roi_tracker = (
+                RoiTracker(self.inference_size) if self.inference_size else None
+            )
 
-                angles = angles_processor.process(joints)
-                angles_processor.update(angles)
-        cap.release()
+            def backfill(data: tuple[int, Any]) -> tuple[int, Any]:
+                return self.__estimate_pose_with(
+                    backfill_model, backfill_roi_tracker, data
+                )
 
-        return joints_processor.data, angles_processor.data
+            yield from self.__sample_frames(frames, backfill, fps)
+
+    def __sample_frames(
+        self,
+        frames: Iterator[tuple[int, Any]],
+        backfill: Callable[[tuple[int, Any]], tuple[int, Any]],
+        fps: int,
+    ) -> Iterator[tuple[int, Any]]:
+        sampler = AdaptiveSampler(self.frame_stride, fps)
+        joints_processor = JointsProcessor(self.joint_names)
+        angles_processor = AnglesProcessor(
+            self.angle_names,
+            list(self.joint_names),
+            self.pose_model_config.angle_joint_idxs,
+        )
+
+        for frame_number, frame in frames:
+            if not sampler.push(frame_number, frame):
+                continue
+            _, world_landmarks = self.__estimate_pose((frame_number, frame))
+            signal_value = None
+            if world_landmarks:
+                angles = angles_processor.process(
+                    joints_processor.process(world_landmarks)
+                )
+                signal_value = np.mean(
+                    [
+                        angles[column].value
+                        for column in self.exercise_config.segmentation_columns
+                    ]
+                )
+
+            for buffered_frame in sampler.observe(frame_number, signal_value):
+                yield backfill(buffered_frame)
+            yield frame_number, world_landmarks
+
+        for buffered_frame in sampler.flush():
+            yield backfill(buffered_frame)
+        self.logger.info(
+            "Skipped pose estimation of %s frames with slow motion ⏩",
+            sampler.skipped_frames,
+        )
 
     def save_results(
         self,
@@ -127,9 +336,32 @@ class VideoAnalysisApp(App):
         mistakes_proecssor: MistakesProcessor,
     ) -> None:
         try:
-            segments_processor.save(output)
-            results_processor.save(output)
-            mistakes_proecssor.save(output)
+            if self.save_format == "npz":
+                self.__save_binary_results(
+                    output, segments_processor, results_processor, mistakes_proecssor
+                )
+            else:
+                segments_processor.save(output)
+                results_processor.save(output)
+                mistakes_proecssor.save(output)
             self.logger.info("Results here: %s 💽", output)
         except ValueError as error:
             self.logger.critical("Error on trying to save results:\n %s", error)
+
+    @staticmethod
+    def __save_binary_results(
+        output: str,
+        segments_processor: SegmentsProcessor,
+        results_processor: ResultsProcessor,
+        mistakes_proecssor: MistakesProcessor,
+    ) -> None:
+        # pylint: disable-next=protected-access
+        output_dir = segments_processor._validate_output(output)
+        save_features(
+            os.path.join(output_dir, FEATURE_STORE_FILE),
+            {
+                **SegmentsProcessor.to_arrays(segments_processor.data),
+                **ResultsProcessor.to_arrays(results_processor.data),
+                **MistakesProcessor.to_arrays(mistakes_proecssor.data),
+            },
+        )
@@ -1,5 +1,9 @@
 from dataclasses import dataclass
 
+import numpy as np
+
+from models.frame_table import INITIAL_CAPACITY, FrameTable
+
 ANGLE_PARAMETERS_NUM = 3
 ANGLES_PER_FRAME = 8
 
@@ -13,3 +17,45 @@ class Angle:
     frame: int
     name: str
     value: float
+
+
+class AnglesTable(FrameTable):
+    """
+    Columnar angles storage with one row of angle values per frame
+    """
+
+    def __init__(self, names: list[str], capacity: int = INITIAL_CAPACITY) -> None:
+        super().__init__((len(names),), capacity)
+        self.names = list(names)
+        self.__name_idxs = {name: idx for idx, name in enumerate(self.names)}
+
+    @classmethod
+    def from_arrays(
+        cls,
+        names: list[str],
+        frames: np.ndarray,
+        values: np.ndarray,
+        valid: np.ndarray | None = None,
+    ) -> "AnglesTable":
+        table = cls(names, capacity=0)
+        table._wrap(frames, values, valid)
+        return table
+
+    def column_idxs(self, names: list[str]) -> list[int]:
+        try:
+            return [self.__name_idxs[name] for name in names]
+        except KeyError as error:
+            raise ValueError(f"Unknown angle: {error}") from None
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.column_idxs([name])[0]]
+
+    def columns(self, names: list[str]) -> np.ndarray:
+        return self.values[:, self.column_idxs(names)]
+
+    def to_angles(self, idx: int) -> list[Angle]:
+        frame = int(self.frames[idx])
+        return [
+            Angle(frame, name, value)
+            for name, value in zip(self.names, self.values[idx].tolist())
+        ]
@@ -0,0 +1,138 @@
+import copy
+
+import numpy as np
+
+INITIAL_CAPACITY = 256
+GROWTH_FACTOR = 2
+
+
+class FrameTable:
+    """
+    Growable, preallocated per-frame feature storage backed by NumPy buffers.
+    Every row is flagged valid when measured or invalid when filled in by
+    interpolation, so later stages can leave filled frames out.
+    """
+
+    def __init__(self, row_shape: tuple[int, ...], capacity: int = INITIAL_CAPACITY):
+        self._frames = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty((capacity, *row_shape), dtype=np.float64)
+        self._valid = np.empty(capacity, dtype=bool)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def frames(self) -> np.ndarray:
+        return self._frames[: self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[: self._size]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self._valid[: self._size]
+
+    @property
+    def row_shape(self) -> tuple[int, ...]:
+        return self._values.shape[1:]
+
+    def append(self, frame: int, row: np.ndarray, valid: bool = True) -> None:
+        self.__reserve(self._size + 1)
+        self._frames[self._size] = frame
+        self._values[self._size] = row
+        self._valid[self._size] = valid
+        self._size += 1
+
+    def extend(
+        self, frames: np.ndarray, rows: np.ndarray, valid: np.ndarray | None = None
+    ) -> None:
+        new_size = self._size + len(frames)
+        self.__reserve(new_size)
+        self._frames[self._size : new_size] = frames
+        self._values[self._size : new_size] = rows
+        self._valid[self._size : new_size] = True if valid is None else valid
+        self._size = new_size
+
+    def slice(self, start_idx: int, stop_idx: int) -> "FrameTable":
+        """
+        Zero-copy view of rows in [start_idx, stop_idx)
+        """
+        view = copy.copy(self)
+        view._frames = self._frames[start_idx : min(stop_idx, self._size)]
+        view._values = self._values[start_idx : min(stop_idx, self._size)]
+        view._valid = self._valid[start_idx : min(stop_idx, self._size)]
+        view._size = len(view._frames)
+        return view
+
+    def between(self, start_frame: int, finish_frame: int) -> "FrameTable":
+        """
+        Zero-copy view of rows with start_frame <= frame <= finish_frame
+        """
+        start_idx = np.searchsorted(self.frames, start_frame, side="left")
+        stop_idx = np.searchsorted(self.frames, finish_frame, side="right")
+        return self.slice(start_idx, stop_idx)
+
+    def fill_gaps(self, max_gap: int) -> "FrameTable":
+        """
+        Copy with rows of missing frames linearly interpolated between their
+        neighbours, for gaps no longer than max_gap frames, flagged invalid
+        """
+        frames = self.frames
+        gaps = np.diff(frames)
+        filled = (gaps > 1) & (gaps <= max_gap)
+        if not np.any(filled):
+            return self
+
+        missing_frames = np.concatenate(
+            [
+                np.arange(frame + 1, frame + gap)
+                for frame, gap in zip(frames[:-1][filled], gaps[filled])
+            ]
+        )
+        all_frames = np.sort(np.concatenate([frames, missing_frames]))
+        previous_idxs = np.searchsorted(frames, all_frames, side="right") - 1
+        next_idxs = np.minimum(previous_idxs + 1, len(frames) - 1)
+        spans = np.maximum(frames[next_idxs] - frames[previous_idxs], 1)
+        weights = (all_frames - frames[previous_idxs]) / spans
+        weights = weights.reshape(-1, *([1] * len(self.row_shape)))
+
+        values = self.values
+        table = copy.copy(self)
+        table._wrap(
+            all_frames,
+            values[previous_idxs] * (1 - weights) + values[next_idxs] * weights,
+            self.valid[previous_idxs] & (all_frames == frames[previous_idxs]),
+        )
+        return table
+
+    def _wrap(
+        self, frames: np.ndarray, values: np.ndarray, valid: np.ndarray | None = None
+    ) -> None:
+        if len(frames) != len(values) or values.shape[1:] != self.row_shape:
+            raise ValueError("Frames and values do not match the table layout.")
+        if valid is not None and len(valid) != len(frames):
+            raise ValueError("Valid mask does not match the table frames.")
+        self._frames = np.asarray(frames, dtype=np.int64)
+        self._values = np.asarray(values, dtype=np.float64)
+        self._valid = (
+            np.ones(len(frames), dtype=bool)
+            if valid is None
+            else np.asarray(valid, dtype=bool)
+        )
+        self._size = len(self._frames)
+
+    def __reserve(self, size: int) -> None:
+        capacity = len(self._frames)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * GROWTH_FACTOR, INITIAL_CAPACITY)
+
+        frames = np.empty(capacity, dtype=np.int64)
+        values = np.empty((capacity, *self.row_shape), dtype=np.float64)
+        valid = np.empty(capacity, dtype=bool)
+        frames[: self._size] = self.frames
+        values[: self._size] = self.values
+        valid[: self._size] = self.valid
+        self._frames, self._values, self._valid = frames, values, valid
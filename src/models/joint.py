@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 
+import numpy as np
+
+from models.frame_table import INITIAL_CAPACITY, FrameTable
+
 JOINT_PARAMETERS_NUM = 7
 JOINTS_PER_FRAME = 16
+JOINT_VALUES = ("x", "y", "z", "visibility")
 
 
 @dataclass
@@ -17,3 +22,46 @@ class Joint:
     y: float
     z: float
     visibility: float
+
+
+class JointsTable(FrameTable):
+    """
+    Columnar joints storage with one (n_joints, 4) row of x, y, z, visibility per frame
+    """
+
+    def __init__(
+        self, ids: list[int], names: list[str], capacity: int = INITIAL_CAPACITY
+    ) -> None:
+        super().__init__((len(ids), len(JOINT_VALUES)), capacity)
+        self.ids = list(ids)
+        self.names = list(names)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        ids: list[int],
+        names: list[str],
+        frames: np.ndarray,
+        values: np.ndarray,
+        valid: np.ndarray | None = None,
+    ) -> "JointsTable":
+        table = cls(ids, names, capacity=0)
+        table._wrap(frames, values, valid)
+        return table
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        return self.values[..., :3]
+
+    @property
+    def visibility(self) -> np.ndarray:
+        return self.values[..., 3]
+
+    def to_joints(self, idx: int) -> list[Joint]:
+        frame = int(self.frames[idx])
+        return [
+            Joint(frame, joint_id, name, *values)
+            for joint_id, name, values in zip(
+                self.ids, self.names, self.values[idx].tolist()
+            )
+        ]
@@ -12,3 +12,5 @@ class Mistake:
     fix_info: str
     angle_name: str
     threshold: float
+    violated_frames: int = 0
+    max_violation: float = 0.0
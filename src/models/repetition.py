@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Repetition:
+    """
+    Timing of one repetition counted in live app
+    """
+
+    rep: int
+    start_frame: int
+    bottom_frame: int
+    finish_frame: int
+    eccentric_time: float
+    concentric_time: float
+
+    @property
+    def time_under_tension(self) -> float:
+        return self.eccentric_time + self.concentric_time
+
+    @property
+    def tempo(self) -> str:
+        return f"{self.eccentric_time:.1f}-{self.concentric_time:.1f}"
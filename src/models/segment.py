@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 
-from models.angle import Angle
-from models.joint import Joint
+from models.angle import AnglesTable
+from models.joint import JointsTable
 
 
 @dataclass
@@ -13,5 +13,5 @@ class Segment:
     start_frame: int
     finish_frame: int
     rep: int
-    joints: list[Joint]
-    angles: list[Angle]
+    joints: JointsTable
+    angles: AnglesTable
@@ -3,57 +3,148 @@ import os
 import numpy as np
 import pandas as pd
 
-from models.angle import ANGLE_PARAMETERS_NUM, Angle
-from models.joint import Joint
+from models.angle import ANGLE_PARAMETERS_NUM, Angle, AnglesTable
+from models.joint import Joint, JointsTable
 from processors.base import Processor
 
 # For mediapipe Y is switched with Z
-MEDIAPIPE_ANGLE_TYPES = {"3D": [0, 1, 2], "top": [0, 2], "side": [0, 1], "front": [1, 2]}
+MEDIAPIPE_ANGLE_TYPES = {
+    "3D": [0, 1, 2],
+    "top": [0, 2],
+    "side": [0, 1],
+    "front": [1, 2],
+}
+
+
+def get_angle_columns(angle_names: list[str]) -> list[str]:
+    """
+    Names of angles in every projection, in the order of angles table columns
+    """
+    return [
+        f"{angle_name}_{angle_type}"
+        for angle_name in angle_names
+        for angle_type in MEDIAPIPE_ANGLE_TYPES
+    ]
 
 
 class AnglesProcessor(Processor):
-    def __init__(self, angle_names: dict) -> None:
+    def __init__(
+        self,
+        angle_names: dict,
+        joint_ids: list[int] | None = None,
+        angle_joint_idxs: np.ndarray | None = None,
+    ) -> None:
+        """
+        `angle_joint_idxs` are compiled positions of angle joints in `joint_ids`,
+        used for tables laid out in that order without resolving joint ids again
+        """
         super().__init__()
         self.angle_names = angle_names
+        self.angle_columns = get_angle_columns(angle_names)
+
+        self.__angle_joint_idxs: dict[tuple[int, ...], np.ndarray] = {}
+        if joint_ids is not None and angle_joint_idxs is not None:
+            self.__angle_joint_idxs[tuple(joint_ids)] = angle_joint_idxs
+
+        self.__projection_masks = np.zeros((len(MEDIAPIPE_ANGLE_TYPES), 3))
+        for type_idx, angle_dims in enumerate(MEDIAPIPE_ANGLE_TYPES.values()):
+            self.__projection_masks[type_idx, angle_dims] = 1
+
+        self.data = AnglesTable(self.angle_columns)
 
     def __len__(self) -> int:
-        return len(self.data) * ANGLE_PARAMETERS_NUM
+        return len(self.data) * len(self.angle_columns) * ANGLE_PARAMETERS_NUM
 
     def process(self, data: list[Joint]) -> list[Angle]:
         frame_number = data[0].frame
-        joint_dict = {joint.id: [joint.x, joint.y, joint.z] for joint in data}
-
-        angles = []
-        for angle_name, joint_ids in self.angle_names.items():
-            coords = np.array([joint_dict[joint_id] for joint_id in joint_ids])
-            for angle_type, angle_dims in MEDIAPIPE_ANGLE_TYPES.items():
-                angle = self.__calculate_angle(*coords, angle_dims)
-                angles.append(Angle(frame_number, f"{angle_name}_{angle_type}", angle))
-
-        return angles
+        joint_ids = [joint.id for joint in data]
+        coords = np.array([[[joint.x, joint.y, joint.z] for joint in data]])
+
+        angle_values = self.process_batch(coords, joint_ids)[0]
+        return [
+            Angle(frame_number, angle_name, angle_value)
+            for angle_name, angle_value in zip(self.angle_columns, angle_values)
+        ]
+
+    def process_frames(self, data: JointsTable) -> AnglesTable:
+        """
+        Calculate angles for all frames of the joints table in one pass
+        """
+        angle_values = self.process_batch(data.coordinates, data.ids)
+        return AnglesTable.from_arrays(
+            self.angle_columns, data.frames.copy(), angle_values, data.valid.copy()
+        )
 
-    def update(self, data: list[Angle]) -> None:
-        self.data.extend(data)
+    def process_batch(self, data: np.ndarray, joint_ids: list[int]) -> np.ndarray:
+        """
+        Calculate every angle in every projection for (n_frames, n_joints, 3) joint
+        coordinates. Returns (n_frames, n_angles) matrix ordered as `angle_columns`.
+        """
+        if data.ndim != 3 or data.shape[1:] != (len(joint_ids), 3):
+            raise ValueError(
+                f"Input array must be of shape (n_frames, {len(joint_ids)}, 3)."
+            )
+        coords = data[:, self.__get_angle_joint_idxs(joint_ids)]
+        v21 = coords[:, :, 0] - coords[:, :, 1]
+        v23 = coords[:, :, 2] - coords[:, :, 1]
+
+        v21 = v21[:, :, np.newaxis, :] * self.__projection_masks
+        v23 = v23[:, :, np.newaxis, :] * self.__projection_masks
+
+        cosine_angles = np.sum(v21 * v23, axis=-1) / (
+            np.linalg.norm(v21, axis=-1) * np.linalg.norm(v23, axis=-1)
+        )
+        angles = np.degrees(np.arccos(np.clip(cosine_angles, -1.0, 1.0)))
+
+        return angles.reshape(len(data), -1)
+
+    def __get_angle_joint_idxs(self, joint_ids: list[int]) -> np.ndarray:
+        key = tuple(joint_ids)
+        angle_joint_idxs = self.__angle_joint_idxs.get(key)
+        if angle_joint_idxs is not None:
+            return angle_joint_idxs
+
+        joint_positions = {joint_id: idx for idx, joint_id in enumerate(joint_ids)}
+        try:
+            angle_joint_idxs = np.array(
+                [
+                    [joint_positions[joint_id] for joint_id in angle_joint_ids]
+                    for angle_joint_ids in self.angle_names.values()
+                ],
+                dtype=int,
+            ).reshape(-1, 3)
+        except KeyError as error:
+            raise ValueError(f"Missing joint required by angles: {error}") from None
+        self.__angle_joint_idxs[key] = angle_joint_idxs
+        return angle_joint_idxs
+
+    def update(self, data: list[Angle] | AnglesTable) -> None:
+        if isinstance(data, AnglesTable):
+            self.data.extend(data.frames, data.columns(self.angle_columns), data.valid)
+        else:
+            self.data.append(data[0].frame, [angle.value for angle in data])
 
     @staticmethod
-    def to_df(data: list[Angle]) -> pd.DataFrame:
-        df = pd.DataFrame(data)
-        df_reshaped = df.pivot(index="frame", columns="name", values="value")
-        return df_reshaped
+    def to_df(data: AnglesTable) -> pd.DataFrame:
+        df = pd.DataFrame(
+            data.values,
+            index=pd.Index(data.frames, name="frame"),
+            columns=data.names,
+        )
+        return df
 
     @staticmethod
-    def from_df(df: pd.DataFrame) -> list[Angle]:
-        value_vars = df.columns
-        df_melted = df.melt(
-            id_vars=["frame"],
-            value_vars=value_vars,
-            var_name="angle_name",
-            value_name="value",
+    def from_df(df: pd.DataFrame) -> AnglesTable:
+        if "frame" not in df.columns:
+            df = df.reset_index()
+        names = [
+            column for column in df.select_dtypes("number").columns if column != "frame"
+        ]
+        return AnglesTable.from_arrays(
+            names,
+            df["frame"].to_numpy(),
+            df[names].to_numpy(dtype=np.float64),
         )
-        angles = []
-        for _, angle in df_melted.iterrows():
-            angles.append(Angle(angle["frame"], angle["angle_name"], angle["value"]))
-        return angles
 
     def save(self, output_dir: str) -> None:
         output = self._validate_output(output_dir)
@@ -61,21 +152,3 @@ class AnglesProcessor(Processor):
 
         results_path = os.path.join(output, "angles.csv")
         angles_df.to_csv(results_path, index=True)
-
-    @staticmethod
-    def __calculate_angle(
-        v1: np.ndarray, v2: np.ndarray, v3: np.ndarray, dims: list
-    ) -> float:
-        if not all(arr.shape == (3,) for arr in (v1, v2, v3)):
-            raise ValueError("Input arrays must all be of shape (3,).")
-        v1 = v1[dims]
-        v2 = v2[dims]
-        v3 = v3[dims]
-
-        v21 = v1 - v2
-        v23 = v3 - v2
-
-        cosine_angle = np.dot(v21, v23) / (np.linalg.norm(v21) * np.linalg.norm(v23))
-        angle = np.arccos(cosine_angle)
-
-        return np.degrees(angle)
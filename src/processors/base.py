@@ -1,6 +1,7 @@
 import datetime
 import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import pandas as pd
@@ -41,6 +42,16 @@ class Processor(ABC):
         Convert data from DataFrame object
         """
 
+    @classmethod
+    def from_csv_files(cls, paths: list[str], workers: int | None = None) -> list[Any]:
+        """
+        Load many CSV files concurrently, converting each with `from_df`
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(lambda path: cls.from_df(pd.read_csv(path)), paths)
+            )
+
     @abstractmethod
     def save(self, output_dir: str) -> None:
         """
@@ -1,9 +1,10 @@
 import os
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
-from models.joint import JOINT_PARAMETERS_NUM, Joint
+from models.joint import JOINT_PARAMETERS_NUM, JOINT_VALUES, Joint, JointsTable
 from processors.base import Processor
 
 
@@ -17,50 +18,69 @@ class JointsProcessor(Processor):
     def __init__(self, joint_names: dict) -> None:
         super().__init__()
         self.joint_names = joint_names
+        self.data = JointsTable(list(joint_names.keys()), list(joint_names.values()))
 
     def __len__(self) -> int:
-        return len(self.data) * JOINT_PARAMETERS_NUM
+        return len(self.data) * len(self.joint_names) * JOINT_PARAMETERS_NUM
 
     def process(self, data: Any) -> list[Joint]:
+        landmarks = data.landmark
         return [
             Joint(
                 frame=self.current_processing_frame,
                 id=idx,
-                name=self.joint_names[idx],
-                x=joint.x,
-                y=joint.y,
-                z=joint.z,
-                visibility=joint.visibility,
+                name=name,
+                x=landmarks[idx].x,
+                y=landmarks[idx].y,
+                z=landmarks[idx].z,
+                visibility=landmarks[idx].visibility,
             )
-            for idx, joint in enumerate(data.landmark)
-            if idx in self.joint_names.keys()
+            for idx, name in self.joint_names.items()
         ]
 
     def update(self, data: list[Joint]) -> None:
-        self.data.extend(data)
+        self.data.append(
+            data[0].frame,
+            [[joint.x, joint.y, joint.z, joint.visibility] for joint in data],
+        )
 
     @staticmethod
-    def to_df(data: list[list[Joint]]) -> pd.DataFrame:
-        df = pd.DataFrame(data)
+    def to_df(data: JointsTable) -> pd.DataFrame:
+        joints_num = len(data.ids)
+        values = data.values.reshape(-1, len(JOINT_VALUES))
+        df = pd.DataFrame(
+            {
+                "frame": np.repeat(data.frames, joints_num),
+                "id": np.tile(data.ids, len(data)),
+                "name": np.tile(data.names, len(data)),
+                **{column: values[:, idx] for idx, column in enumerate(JOINT_VALUES)},
+            }
+        )
         df = df.set_index("frame")
         return df
 
     @staticmethod
-    def from_df(df: pd.DataFrame) -> list[list[Joint]]:
-        joints = []
-        for _, joint in df.iterrows():
-            joints.append(
-                Joint(
-                    joint["frame"],
-                    joint["id"],
-                    joint["name"],
-                    joint["x"],
-                    joint["y"],
-                    joint["z"],
-                    joint["visibility"],
-                )
-            )
-        return joints
+    def from_df(df: pd.DataFrame) -> JointsTable:
+        if "frame" not in df.columns:
+            if df.index.name == "frame":
+                df = df.reset_index()
+            else:
+                df = df.assign(frame=df.groupby("id").cumcount() + 1)
+        df = df.sort_values("frame", kind="stable")
+
+        first_frame = df["frame"].iloc[0]
+        first_joints = df[df["frame"] == first_frame]
+        joints_num = len(first_joints)
+        if len(df) % joints_num:
+            raise ValueError("Every frame must contain the same joints.")
+
+        values = df[list(JOINT_VALUES)].to_numpy(dtype=np.float64)
+        return JointsTable.from_arrays(
+            ids=first_joints["id"].tolist(),
+            names=first_joints["name"].tolist(),
+            frames=df["frame"].to_numpy()[::joints_num],
+            values=values.reshape(-1, joints_num, len(JOINT_VALUES)),
+        )
 
     def save(self, output_dir: str) -> None:
         output = self._validate_output(output_dir)
@@ -68,4 +88,4 @@ class JointsProcessor(Processor):
         joints_df = self.to_df(self.data)
 
         results_path = os.path.join(output, "joints.csv")
-        joints_df.to_csv(results_path, index=False)
+        joints_df.to_csv(results_path, index=True)
@@ -1,9 +1,11 @@
+import dataclasses
 import os
 
+import numpy as np
 import pandas as pd
 
+from models.angle import AnglesTable
 from models.mistake import Mistake
-from models.result import Result
 from processors.base import Processor
 
 FIX_INFO_KEY = "fix_info"
@@ -16,17 +18,45 @@ class MistakesProcessor(Processor):
     def __init__(self, mistakes_table: dict, exercise: str) -> None:
         super().__init__()
         self.mistake_templates = self.__get_mistake_templates(mistakes_table, exercise)
+        thresholds = np.array(
+            [template.threshold for template in self.mistake_templates], dtype=float
+        )
+        self.__threshold_signs = np.where(thresholds < 0, -1.0, 1.0)
+        self.__threshold_limits = np.abs(thresholds)
+        self.__column_idxs: dict[tuple[str, ...], tuple[np.ndarray, np.ndarray]] = {}
 
-    def process(self, data: list[Result]) -> list[Mistake]:
-        # TODO: improve this
-        mistakes = [
-            mistake_template
-            for mistake_template in self.mistake_templates
-            for result in data
-            if result.angle_name == mistake_template.angle_name
-            and abs(result.diff) > mistake_template.threshold
+    def process(self, data: AnglesTable) -> list[Mistake]:
+        """
+        Mistakes whose threshold is crossed by the angle differences in any frame,
+        with the number of such frames and the largest excess over the threshold
+        """
+        template_idxs, violations = self.violations(data)
+        violated_frames = np.count_nonzero(violations > 0, axis=0)
+        max_violations = violations.max(axis=0, initial=0.0)
+        return [
+            dataclasses.replace(
+                self.mistake_templates[template_idx],
+                violated_frames=int(violated_frames[idx]),
+                max_violation=float(max_violations[idx]),
+            )
+            for idx, template_idx in enumerate(template_idxs)
+            if violated_frames[idx]
         ]
-        return list(set(mistakes))
+
+    def violations(self, data: AnglesTable) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Indexes of templates whose angle is in data and (n_frames, n_templates)
+        excess of their differences over thresholds, zero where not crossed or in
+        frames filled in by interpolation. Negative thresholds are crossed by lower
+        differences, positive by higher.
+        """
+        template_idxs, column_idxs = self.__get_column_idxs(data.names)
+        excess = (
+            data.values[:, column_idxs] * self.__threshold_signs[template_idxs]
+            - self.__threshold_limits[template_idxs]
+        )
+        excess[~data.valid] = 0
+        return template_idxs, np.maximum(excess, 0)
 
     def update(self, data: list[Mistake]) -> None:
         self.data.append(data)
@@ -38,18 +68,57 @@ class MistakesProcessor(Processor):
 
     @staticmethod
     def from_df(df: pd.DataFrame) -> list[Mistake]:
-        mistakes = []
-        for _, mistake in df.iterrows():
-            mistakes.append(
-                Mistake(
-                    mistake["exercise"],
-                    mistake["mistake_name"],
-                    mistake["fix_info"],
-                    mistake["angle_name"],
-                    mistake["threshold"],
-                )
+        columns = ["exercise", "mistake_name", "fix_info", "angle_name", "threshold"]
+        columns += [
+            column
+            for column in ("violated_frames", "max_violation")
+            if column in df.columns
+        ]
+        return [
+            Mistake(*mistake)
+            for mistake in zip(*(df[column].tolist() for column in columns))
+        ]
+
+    @staticmethod
+    def to_arrays(data: list[list[Mistake]]) -> dict[str, np.ndarray]:
+        mistakes = [mistake for rep_mistakes in data for mistake in rep_mistakes]
+        return {
+            "mistakes_counts": np.array(
+                [len(rep_mistakes) for rep_mistakes in data], dtype=int
+            ),
+            "mistakes_exercises": np.array([mistake.exercise for mistake in mistakes]),
+            "mistakes_names": np.array([mistake.mistake_name for mistake in mistakes]),
+            "mistakes_fix_infos": np.array([mistake.fix_info for mistake in mistakes]),
+            "mistakes_angle_names": np.array(
+                [mistake.angle_name for mistake in mistakes]
+            ),
+            "mistakes_thresholds": np.array(
+                [mistake.threshold for mistake in mistakes], dtype=float
+            ),
+            "mistakes_violated_frames": np.array(
+                [mistake.violated_frames for mistake in mistakes], dtype=int
+            ),
+            "mistakes_max_violations": np.array(
+                [mistake.max_violation for mistake in mistakes], dtype=float
+            ),
+        }
+
+    @staticmethod
+    def from_arrays(arrays: dict[str, np.ndarray]) -> list[list[Mistake]]:
+        offsets = np.cumsum(np.r_[0, arrays["mistakes_counts"]])
+        mistakes = [
+            Mistake(*mistake)
+            for mistake in zip(
+                arrays["mistakes_exercises"].tolist(),
+                arrays["mistakes_names"].tolist(),
+                arrays["mistakes_fix_infos"].tolist(),
+                arrays["mistakes_angle_names"].tolist(),
+                arrays["mistakes_thresholds"].tolist(),
+                arrays["mistakes_violated_frames"].tolist(),
+                arrays["mistakes_max_violations"].tolist(),
             )
-        return mistakes
+        ]
+        return [mistakes[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
 
     def save(self, output_dir: str) -> None:
         output = self._validate_output(output_dir)
@@ -60,6 +129,27 @@ class MistakesProcessor(Processor):
             results_df = self.to_df(segment_mistakes)
             results_df.to_csv(os.path.join(results_path, "mistakes.csv"), index=False)
 
+    def __get_column_idxs(self, names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        key = tuple(names)
+        if key not in self.__column_idxs:
+            name_idxs = {name: idx for idx, name in enumerate(names)}
+            template_idxs = [
+                idx
+                for idx, template in enumerate(self.mistake_templates)
+                if template.angle_name in name_idxs
+            ]
+            self.__column_idxs[key] = (
+                np.array(template_idxs, dtype=int),
+                np.array(
+                    [
+                        name_idxs[self.mistake_templates[idx].angle_name]
+                        for idx in template_idxs
+                    ],
+                    dtype=int,
+                ),
+            )
+        return self.__column_idxs[key]
+
     @staticmethod
     def __get_mistake_templates(mistakes_table: dict, exercise: str) -> list[Mistake]:
         mistake_templates = []
@@ -1,14 +1,24 @@
 import os
 
+import numpy as np
 import pandas as pd
 
-from models.mistake import Mistake
-from models.result import Result
+from models.angle import AnglesTable
 from models.segment import Segment
-from processors.angles_processor import MEDIAPIPE_ANGLE_TYPES
+from processors.angles_processor import AnglesProcessor, get_angle_columns
 from processors.base import Processor
-from utils.dtw import (filter_repetable_reference_indexes,
-                       get_warped_frame_indexes)
+from utils.dtw import (
+    DEFAULT_SAKOE_CHIBA_RADIUS,
+    REDUCTION_POLICIES,
+    fill_nan,
+    get_envelope,
+    get_warping_path,
+    get_warping_window,
+    lb_keogh,
+    reduce_warped_mask,
+    reduce_warped_values,
+)
+from utils.reference_index import ReferenceIndex
 
 
 class ResultsProcessor(Processor):
@@ -17,58 +27,134 @@ class ResultsProcessor(Processor):
     """
 
     def __init__(
-        self, reference_segement: Segment, compariston_features: list[str]
+        self,
+        references: Segment | ReferenceIndex | list[ReferenceIndex],
+        compariston_features: list[str],
+        global_constraint: str | None = None,
+        sakoe_chiba_radius: int | None = None,
+        itakura_max_slope: float | None = None,
+        max_distance: float | None = None,
+        reduction: str = "first",
     ) -> None:
         super().__init__()
-        self.reference_segment = reference_segement
+        if reduction not in REDUCTION_POLICIES:
+            raise ValueError(f"Unknown reduction policy: {reduction}")
         self.comparison_features = compariston_features
+        self.global_constraint = global_constraint
+        self.sakoe_chiba_radius = sakoe_chiba_radius
+        self.itakura_max_slope = itakura_max_slope
+        self.max_distance = max_distance
+        self.reduction = reduction
 
-    def process(self, data: Segment) -> Result:
-        query = data
-        results = []
-        for feature in self.comparison_features:
-            for angle_type in MEDIAPIPE_ANGLE_TYPES.keys():
-                angle_name = feature + "_" + angle_type
-                query = [
-                    angle.value for angle in data.angles if angle.name == angle_name
-                ]
-                reference = [
-                    angle.value
-                    for angle in self.reference_segment.angles
-                    if angle.name == angle_name
-                ]
-                path = get_warped_frame_indexes(query, reference)
-                query_to_reference_warping = filter_repetable_reference_indexes(
-                    path[:, 1], path[:, 0]
-                )
-                for reference_idx, query_idx in enumerate(query_to_reference_warping):
-                    diff = reference[reference_idx] - query[query_idx]
-                    results.append(Result(reference_idx + 1, angle_name, diff))
-
-        return results
-
-    def update(self, data: list[Result]) -> None:
+        self.angle_columns = get_angle_columns(compariston_features)
+        if not isinstance(references, list):
+            references = [references]
+        self.references = [
+            self.__get_reference_index(reference) for reference in references
+        ]
+        self.reference_segment = self.references[0].segment
+        self.__envelopes: dict[tuple[int, int], tuple[np.ndarray, np.ndarray]] = {}
+
+    def process(self, data: Segment) -> AnglesTable:
+        """
+        Align query once over all comparison angles with its nearest reference and
+        return reference minus warped query values for every reference frame, with
+        query frames matched to the same reference frame reduced by `reduction`
+        policy. Differences are valid only where every matched query frame is.
+
+        NaN frames of an angle are interpolated for DTW and angles NaN in every
+        frame of query or reference are left out of its cost, so distances stay
+        finite. References are visited in order of their lower bounds and skipped
+        once the bound exceeds the best DTW distance found so far. A query farther
+        than `max_distance` from every reference is rejected, by its lower bounds
+        without any DTW when possible. DTW itself always runs to completion.
+        """
+        query = data.angles.columns(self.angle_columns)
+        dtw_query = fill_nan(query)
+        cost_columns = [
+            np.flatnonzero(
+                ~np.isnan(dtw_query).any(axis=0)
+                & ~np.isnan(reference.dtw_values).any(axis=0)
+            )
+            for reference in self.references
+        ]
+        lower_bounds = self.__get_lower_bounds(dtw_query, cost_columns)
+        if self.max_distance is not None and lower_bounds.min() > self.max_distance:
+            return AnglesTable(self.angle_columns, capacity=0)
+
+        best_distance, best_path, best_reference = np.inf, None, None
+        for reference_idx in np.argsort(lower_bounds, kind="stable"):
+            if lower_bounds[reference_idx] >= best_distance:
+                break
+            columns = cost_columns[reference_idx]
+            if not len(columns):
+                continue
+            reference = self.references[reference_idx]
+            path, distance = get_warping_path(
+                dtw_query[:, columns],
+                reference.dtw_values[:, columns],
+                global_constraint=self.global_constraint,
+                sakoe_chiba_radius=self.sakoe_chiba_radius,
+                itakura_max_slope=self.itakura_max_slope,
+            )
+            if distance < best_distance:
+                best_distance, best_path = distance, path
+                best_reference = reference.values
+
+        if best_path is None or (
+            self.max_distance is not None and best_distance > self.max_distance
+        ):
+            return AnglesTable(self.angle_columns, capacity=0)
+        diffs = best_reference - reduce_warped_values(query, best_path, self.reduction)
+        return AnglesTable.from_arrays(
+            self.angle_columns,
+            np.arange(1, len(diffs) + 1),
+            diffs,
+            reduce_warped_mask(data.angles.valid, best_path),
+        )
+
+    def update(self, data: AnglesTable) -> None:
         self.data.append(data)
 
     @staticmethod
-    def to_df(data: list[Result]) -> pd.DataFrame:
-        df = pd.DataFrame(data)
-        df_reshaped = df.pivot(index="frame", columns="angle_name", values="diff")
-        return df_reshaped
+    def to_df(data: AnglesTable) -> pd.DataFrame:
+        return AnglesProcessor.to_df(data)
 
     @staticmethod
-    def from_df(df: pd.DataFrame) -> list[Result]:
-        results = []
-        for _, result in df.iterrows():
-            results.append(
-                Result(
-                    result["frame"],
-                    results["rep"],
-                    result["angle_name"],
-                    result["diff"],
-                )
-            )
-        return results
+    def from_df(df: pd.DataFrame) -> AnglesTable:
+        if "diff" in df.columns:
+            df = df.pivot(index="frame", columns="angle_name", values="diff")
+        return AnglesProcessor.from_df(df)
+
+    @staticmethod
+    def to_arrays(data: list[AnglesTable]) -> dict[str, np.ndarray]:
+        names = data[0].names if data else []
+        return {
+            "results_counts": np.array([len(table) for table in data], dtype=int),
+            "results_angle_names": np.array(names),
+            "results_frames": np.concatenate(
+                [table.frames for table in data] or [np.empty(0, dtype=int)]
+            ),
+            "results_diffs": np.concatenate(
+                [table.values for table in data] or [np.empty((0, len(names)))]
+            ),
+            "results_valid": np.concatenate(
+                [table.valid for table in data] or [np.empty(0, dtype=bool)]
+            ),
+        }
+
+    @staticmethod
+    def from_arrays(arrays: dict[str, np.ndarray]) -> list[AnglesTable]:
+        offsets = np.cumsum(np.r_[0, arrays["results_counts"]])
+        results = AnglesTable.from_arrays(
+            names=arrays["results_angle_names"].tolist(),
+            frames=arrays["results_frames"],
+            values=arrays["results_diffs"],
+            valid=arrays.get("results_valid"),
+        )
+        return [
+            results.slice(start, stop) for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
 
     def save(self, output_dir: str) -> None:
         output = self._validate_output(output_dir)
@@ -78,3 +164,54 @@ class ResultsProcessor(Processor):
             os.makedirs(results_path, exist_ok=True)
             results_df = self.to_df(segment_results)
             results_df.to_csv(os.path.join(results_path, "angles_diffs.csv"))
+
+    def __get_reference_index(
+        self, reference: Segment | ReferenceIndex
+    ) -> ReferenceIndex:
+        if isinstance(reference, Segment):
+            return ReferenceIndex.build(reference, self.angle_columns)
+        if reference.angle_columns != self.angle_columns:
+            raise ValueError("Reference index was built for other comparison angles.")
+        return reference
+
+    def __get_lower_bounds(
+        self, query: np.ndarray, cost_columns: list[np.ndarray]
+    ) -> np.ndarray:
+        """
+        LB_Keogh of every reference over the angles of its DTW cost, needed only
+        for pruning and the max_distance pre-check
+        """
+        if len(self.references) == 1 and self.max_distance is None:
+            return np.zeros(1)
+        lower_bounds = np.zeros(len(self.references))
+        for reference_idx, columns in enumerate(cost_columns):
+            lower, upper = self.__get_envelope(reference_idx, len(query))
+            lower_bounds[reference_idx] = lb_keogh(
+                query[:, columns], lower[..., columns], upper[..., columns]
+            )
+        return lower_bounds
+
+    def __get_envelope(
+        self, reference_idx: int, query_length: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Envelope over the reference frames admissible under the global constraint:
+        the Sakoe-Chiba band, otherwise the whole reference, which holds for the
+        Itakura parallelogram and unconstrained DTW alike
+        """
+        reference = self.references[reference_idx]
+        if self.global_constraint != "sakoe_chiba":
+            return reference.lower, reference.upper
+        key = (reference_idx, query_length)
+        if key not in self.__envelopes:
+            lows, highs = get_warping_window(
+                query_length,
+                len(reference.values),
+                (
+                    DEFAULT_SAKOE_CHIBA_RADIUS
+                    if self.sakoe_chiba_radius is None
+                    else self.sakoe_chiba_radius
+                ),
+            )
+            self.__envelopes[key] = get_envelope(reference.dtw_values, lows, highs)
+        return self.__envelopes[key]
@@ -1,47 +1,69 @@
-from collections import defaultdict
 import os
 
 import numpy as np
 import pandas as pd
+from scipy.signal import find_peaks
 
-from models.angle import Angle
-from models.joint import Joint
+from models.angle import AnglesTable
+from models.joint import JointsTable
 from models.segment import Segment
 from processors.angles_processor import AnglesProcessor
 from processors.base import Processor
 from processors.joints_processor import JointsProcessor
-from scipy.signal import find_peaks
+
+
+def create_segment(
+    joints: JointsTable,
+    angles: AnglesTable,
+    rep: int,
+    start_idx: int,
+    finish_idx: int,
+    joints_aligned: bool,
+) -> Segment:
+    """
+    Repetition spanning rows [start_idx, finish_idx] of the angles table. Joints
+    are sliced by the same rows when aligned with angles, otherwise by frames.
+    """
+    start_frame = int(angles.frames[start_idx])
+    finish_frame = int(angles.frames[finish_idx])
+    return Segment(
+        start_frame=start_frame,
+        finish_frame=finish_frame,
+        rep=rep,
+        joints=(
+            joints.slice(start_idx, finish_idx + 1)
+            if joints_aligned
+            else joints.between(start_frame, finish_frame)
+        ),
+        angles=angles.slice(start_idx, finish_idx + 1),
+    )
 
 
 class SegmentsProcessor(Processor):
-    def __init__(self, fps: int, segmentation_features: dict) -> None:
+    def __init__(
+        self, fps: int, segmentation_features: dict, max_gap: int | None = None
+    ) -> None:
         super().__init__()
         self.fps = fps
         self.segmentation_features = segmentation_features
+        self.max_gap = max_gap
 
-    def process(self, data: tuple[list[Joint], list[Angle]]) -> list[Segment]:
+    def process(self, data: tuple[JointsTable, AnglesTable]) -> list[Segment]:
         joints, angles = data
         peaks, valleys = self._get_peaks_and_valleys(angles)
-        segments_frames = self._get_segments_indexes(peaks, valleys)
-
-        segments = []
-        for rep, (start_frame, finish_frame) in enumerate(segments_frames, 1):
-            segment_angles = [
-                angle for angle in angles if start_frame <= angle.frame <= finish_frame
-            ]
-            segment_joints = [
-                joint for joint in joints if start_frame <= joint.frame <= finish_frame
+        segments_indexes = self._get_segments_indexes(peaks, valleys)
+        if self.max_gap:
+            segments_indexes = [
+                [start_idx, finish_idx]
+                for start_idx, finish_idx in segments_indexes
+                if not self.__has_gap(angles, start_idx, finish_idx)
             ]
-            segments.append(
-                Segment(
-                    start_frame=start_frame,
-                    finish_frame=finish_frame,
-                    rep=rep,
-                    joints=segment_joints,
-                    angles=segment_angles,
-                )
-            )
-        return segments
+        joints_aligned = np.array_equal(joints.frames, angles.frames)
+
+        return [
+            create_segment(joints, angles, rep, start_idx, finish_idx, joints_aligned)
+            for rep, (start_idx, finish_idx) in enumerate(segments_indexes, 1)
+        ]
 
     def update(self, data: list[Segment]) -> None:
         self.data = data
@@ -51,12 +73,12 @@ class SegmentsProcessor(Processor):
         return JointsProcessor.to_df(data.joints), AnglesProcessor.to_df(data.angles)
 
     @staticmethod
-    def from_df(df: tuple[pd.DataFrame, pd.DataFrame]) -> list[Segment]:
+    def from_df(df: tuple[pd.DataFrame, pd.DataFrame]) -> Segment:
         joints_df, angles_df = df
         joints = JointsProcessor.from_df(joints_df)
         angles = AnglesProcessor.from_df(angles_df)
-        start_frame = joints[0].frame
-        finish_frame = joints[-1].frame
+        start_frame = int(joints.frames[0])
+        finish_frame = int(joints.frames[-1])
 
         return Segment(
             rep=0,
@@ -66,6 +88,63 @@ class SegmentsProcessor(Processor):
             angles=angles,
         )
 
+    @staticmethod
+    def to_arrays(data: list[Segment]) -> dict[str, np.ndarray]:
+        joints = [segment.joints for segment in data]
+        angles = [segment.angles for segment in data]
+        return {
+            "segments": np.array(
+                [
+                    [segment.rep, segment.start_frame, segment.finish_frame]
+                    for segment in data
+                ]
+            ),
+            "segments_joints_offsets": np.cumsum(
+                [0] + [len(table) for table in joints]
+            ),
+            "segments_angles_offsets": np.cumsum(
+                [0] + [len(table) for table in angles]
+            ),
+            "joints_ids": np.array(joints[0].ids),
+            "joints_names": np.array(joints[0].names),
+            "joints_frames": np.concatenate([table.frames for table in joints]),
+            "joints_values": np.concatenate([table.values for table in joints]),
+            "joints_valid": np.concatenate([table.valid for table in joints]),
+            "angles_names": np.array(angles[0].names),
+            "angles_frames": np.concatenate([table.frames for table in angles]),
+            "angles_values": np.concatenate([table.values for table in angles]),
+            "angles_valid": np.concatenate([table.valid for table in angles]),
+        }
+
+    @staticmethod
+    def from_arrays(arrays: dict[str, np.ndarray]) -> list[Segment]:
+        joints = JointsTable.from_arrays(
+            ids=arrays["joints_ids"].tolist(),
+            names=arrays["joints_names"].tolist(),
+            frames=arrays["joints_frames"],
+            values=arrays["joints_values"],
+            valid=arrays.get("joints_valid"),
+        )
+        angles = AnglesTable.from_arrays(
+            names=arrays["angles_names"].tolist(),
+            frames=arrays["angles_frames"],
+            values=arrays["angles_values"],
+            valid=arrays.get("angles_valid"),
+        )
+        joints_offsets = arrays["segments_joints_offsets"]
+        angles_offsets = arrays["segments_angles_offsets"]
+
+        return [
+            Segment(
+                start_frame=int(start_frame),
+                finish_frame=int(finish_frame),
+                rep=int(rep),
+                joints=joints.slice(joints_offsets[idx], joints_offsets[idx + 1]),
+                angles=angles.slice(angles_offsets[idx], angles_offsets[idx + 1]),
+            )
+            for idx, (rep, start_frame, finish_frame) in enumerate(arrays["segments"])
+        ]
+
     def save(self, output_dir: str) -> None:
         output = self._validate_output(output_dir)
         for segment in self.data:
@@ -77,13 +156,15 @@ class SegmentsProcessor(Processor):
             joints_df.to_csv(os.path.join(results_path, "joints.csv"))
             angles_df.to_csv(os.path.join(results_path, "angles.csv"))
 
-    def _get_peaks_and_valleys(self, angles: list[Angle]) -> np.ndarray:
-        data = defaultdict(list)
-        for angle in angles:
-            if angle.name in self.segmentation_features:
-                data[angle.frame].append(angle.value)
+    def __has_gap(self, angles: AnglesTable, start_idx: int, finish_idx: int) -> bool:
+        """
+        Check if the repetition spans frames missing for longer than max_gap
+        """
+        frames = angles.frames[start_idx : finish_idx + 1]
+        return bool(np.any(np.diff(frames) > self.max_gap))
 
-        exercise_signal = np.array([np.mean(values) for values in data.values()])
+    def _get_peaks_and_valleys(self, angles: AnglesTable) -> np.ndarray:
+        exercise_signal = angles.columns(self.segmentation_features).mean(axis=1)
         zero_point = np.mean(exercise_signal)
 
         peaks, _ = find_peaks(exercise_signal, zero_point)
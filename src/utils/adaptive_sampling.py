@@ -0,0 +1,93 @@
+from typing import Any
+
+# Degrees per second of the segmentation signal
+DEFAULT_MOTION_THRESHOLD = 90.0
+# Degrees the signal has to turn back by from its extreme to count as extremum
+DEFAULT_HYSTERESIS = 5.0
+
+
+class AdaptiveSampler:
+    """
+    Decides which frames go through pose estimation: every `max_stride` frame while
+    the segmentation signal changes slowly, every frame around its peaks and
+    valleys and during fast motion. Skipped frames are buffered, so the interval
+    in which an extremum or fast motion was detected is processed afterwards.
+    Motion is measured in degrees per second, and a turn of the signal counts as
+    an extremum only once it moves `hysteresis` degrees back from its extreme
+    value, so pose estimation jitter does not keep sampling dense.
+    """
+
+    def __init__(
+        self,
+        max_stride: int,
+        fps: float,
+        motion_threshold: float = DEFAULT_MOTION_THRESHOLD,
+        hysteresis: float = DEFAULT_HYSTERESIS,
+    ) -> None:
+        self.max_stride = max_stride
+        self.fps = fps
+        self.motion_threshold = motion_threshold
+        self.hysteresis = hysteresis
+        self.skipped_frames = 0
+
+        self._buffer: list[tuple[int, Any]] = []
+        self._last_sample: tuple[int, float] | None = None
+        self._extreme: float | None = None
+        self._direction = 0
+        self._next_frame = 0
+        self._dense_until = 0
+
+    def push(self, frame_number: int, frame: Any) -> bool:
+        """
+        Return True if the frame should be processed now, otherwise buffer it
+        """
+        if frame_number >= self._next_frame or frame_number <= self._dense_until:
+            return True
+        self._buffer.append((frame_number, frame))
+        return False
+
+    def observe(self, frame_number: int, value: float | None) -> list[tuple[int, Any]]:
+        """
+        Record signal value of a processed frame (None without detected pose) and
+        return buffered frames preceding it that have to be processed as well
+        """
+        buffered, self._buffer = self._buffer, []
+        self._next_frame = frame_number + self.max_stride
+        if value is None:
+            return buffered
+
+        last_sample, self._last_sample = self._last_sample, (frame_number, value)
+        if last_sample is None:
+            return buffered
+
+        last_frame, last_value = last_sample
+        speed = abs(value - last_value) / (frame_number - last_frame) * self.fps
+        if self.__is_extremum(value) or speed > self.motion_threshold:
+            self._dense_until = frame_number + self.max_stride
+            return buffered
+
+        self.skipped_frames += len(buffered)
+        return []
+
+    def __is_extremum(self, value: float) -> bool:
+        if self._extreme is None:
+            self._extreme = value
+            return False
+        change = value - self._extreme
+        if change * self._direction >= 0 and self._direction:
+            self._extreme = value
+            return False
+        if abs(change) < self.hysteresis:
+            return False
+
+        is_extremum = self._direction != 0
+        self._direction = 1 if change > 0 else -1
+        self._extreme = value
+        return is_extremum
+
+    def flush(self) -> list[tuple[int, Any]]:
+        """
+        Return frames buffered after the last processed frame at the end of video
+        """
+        buffered, self._buffer = self._buffer, []
+        return buffered
@@ -1,20 +1,168 @@
 import numpy as np
 from tslearn.metrics import dtw_path
 
+GLOBAL_CONSTRAINTS = (None, "sakoe_chiba", "itakura")
+REDUCTION_POLICIES = ("first", "mean", "median")
+# tslearn's band radius when sakoe_chiba constraint is set without one
+DEFAULT_SAKOE_CHIBA_RADIUS = 1
 
-def get_warped_frame_indexes(query: np.ndarray, reference: np.ndarray) -> list:
-    path, _ = dtw_path(query, reference)
-    path = np.array(path)
+
+def get_warped_frame_indexes(
+    query: np.ndarray,
+    reference: np.ndarray,
+    global_constraint: str | None = None,
+    sakoe_chiba_radius: int | None = None,
+    itakura_max_slope: float | None = None,
+) -> np.ndarray:
+    path, _ = get_warping_path(
+        query, reference, global_constraint, sakoe_chiba_radius, itakura_max_slope
+    )
     return path
 
 
+def get_warping_path(
+    query: np.ndarray,
+    reference: np.ndarray,
+    global_constraint: str | None = None,
+    sakoe_chiba_radius: int | None = None,
+    itakura_max_slope: float | None = None,
+) -> tuple[np.ndarray, float]:
+    """
+    Optimal warping path of (query_idx, reference_idx) pairs and its DTW distance.
+    Radius and slope only apply together with their global constraint, as tslearn
+    versions differ in inferring the constraint from them.
+    """
+    if global_constraint not in GLOBAL_CONSTRAINTS:
+        raise ValueError(f"Unknown global constraint: {global_constraint}")
+    path, distance = dtw_path(
+        query,
+        reference,
+        global_constraint=global_constraint,
+        sakoe_chiba_radius=(
+            sakoe_chiba_radius if global_constraint == "sakoe_chiba" else None
+        ),
+        itakura_max_slope=itakura_max_slope if global_constraint == "itakura" else None,
+    )
+    return np.array(path), float(distance)
+
+
+def fill_nan(values: np.ndarray) -> np.ndarray:
+    """
+    Copy of (n_frames, n_features) values with NaN frames of every feature linearly
+    interpolated between its known frames and held constant past the first and
+    last one. Features without any known frame stay NaN.
+    """
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+
+    filled = values.copy()
+    frames = np.arange(len(values))
+    for feature_idx in np.flatnonzero(missing.any(axis=0) & ~missing.all(axis=0)):
+        known = ~missing[:, feature_idx]
+        filled[~known, feature_idx] = np.interp(
+            frames[~known], frames[known], values[known, feature_idx]
+        )
+    return filled
+
+
+def get_warping_window(
+    query_length: int, reference_length: int, sakoe_chiba_radius: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inclusive range of reference indexes every query index can be aligned with,
+    matching tslearn's Sakoe-Chiba band. Without radius it spans the whole reference.
+    """
+    query_idxs = np.arange(query_length)
+    if sakoe_chiba_radius is None:
+        return np.zeros(query_length, dtype=int), np.full(
+            query_length, reference_length - 1
+        )
+
+    length_diff = abs(reference_length - query_length)
+    if query_length <= reference_length:
+        lows = query_idxs - sakoe_chiba_radius
+        highs = query_idxs + length_diff + sakoe_chiba_radius
+    else:
+        lows = query_idxs - length_diff - sakoe_chiba_radius
+        highs = query_idxs + sakoe_chiba_radius
+    return (
+        np.clip(lows, 0, reference_length - 1),
+        np.clip(highs, 0, reference_length - 1),
+    )
+
+
+def get_envelope(
+    reference: np.ndarray, lows: np.ndarray, highs: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lower and upper envelope of (n_frames, n_features) reference over the windows
+    """
+    padded = np.concatenate([reference, reference[-1:]])
+    bounds = np.stack([lows, highs + 1], axis=1).ravel()
+    lower = np.minimum.reduceat(padded, bounds, axis=0)[::2]
+    upper = np.maximum.reduceat(padded, bounds, axis=0)[::2]
+    return lower, upper
+
+
+def lb_keogh(query: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> float:
+    """
+    Lower bound of the DTW distance between query and the enveloped reference
+    """
+    excess = np.maximum(query - upper, 0) + np.maximum(lower - query, 0)
+    return float(np.sqrt(np.sum(excess**2)))
+
+
 def filter_repetable_reference_indexes(
     referene_to_query: np.ndarray, query_to_refernce: np.ndarray
 ) -> np.ndarray:
-    query_to_refernce_cp = query_to_refernce.copy()
+    """
+    Keep only the first query index matched with every reference index
+    """
+    return query_to_refernce[_get_runs_mask(referene_to_query)]
+
+
+def reduce_warped_values(
+    query: np.ndarray, path: np.ndarray, policy: str = "first"
+) -> np.ndarray:
+    """
+    Reduce (n_frames, n_features) query values matched by the warping path with every
+    reference index to a single row, returning (n_reference_frames, n_features)
+    """
+    reference_idxs, query_idxs = path[:, 1], path[:, 0]
+    run_starts = np.flatnonzero(_get_runs_mask(reference_idxs))
+    if policy == "first":
+        return query[query_idxs[run_starts]]
+
+    matched = query[query_idxs]
+    run_lengths = np.diff(np.r_[run_starts, len(path)])
+    if policy == "mean":
+        return np.add.reduceat(matched, run_starts, axis=0) / run_lengths[:, None]
+    if policy == "median":
+        run_ids = np.repeat(np.arange(len(run_starts)), run_lengths)
+        lower_idxs = run_starts + (run_lengths - 1) // 2
+        upper_idxs = run_starts + run_lengths // 2
+        medians = np.empty((len(run_starts), matched.shape[1]))
+        for feature_idx in range(matched.shape[1]):
+            order = np.lexsort((matched[:, feature_idx], run_ids))
+            sorted_values = matched[order, feature_idx]
+            medians[:, feature_idx] = (
+                sorted_values[lower_idxs] + sorted_values[upper_idxs]
+            ) / 2
+        return medians
+    raise ValueError(f"Unknown reduction policy: {policy}")
+
+
+def reduce_warped_mask(mask: np.ndarray, path: np.ndarray) -> np.ndarray:
+    """
+    Reduce (n_frames,) query mask matched by the warping path with every reference
+    index to whether all of the matched query frames are set
+    """
+    run_starts = np.flatnonzero(_get_runs_mask(path[:, 1]))
+    return np.logical_and.reduceat(mask[path[:, 0]], run_starts)
 
-    for idx in range(len(referene_to_query) - 1, -1, -1):
-        if idx > 0 and referene_to_query[idx] == referene_to_query[idx - 1]:
-            query_to_refernce_cp = np.delete(query_to_refernce_cp, idx)
 
-    return query_to_refernce_cp
+def _get_runs_mask(indexes: np.ndarray) -> np.ndarray:
+    mask = np.ones(len(indexes), dtype=bool)
+    mask[1:] = indexes[1:] != indexes[:-1]
+    return mask
@@ -0,0 +1,236 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import numpy as np
+
+from processors.angles_processor import get_angle_columns
+from utils.dtw import GLOBAL_CONSTRAINTS, REDUCTION_POLICIES
+
+SETTINGS_KEY = "settings"
+JOINTS_KEY = "joints"
+ANGLES_KEY = "angles"
+CONNECTIONS_KEY = "connections"
+VISUALIZED_CONNECTIONS = "torso"
+
+SEGMENT_ANGLES_KEY = "segment_angles"
+COMPARISON_FEATURES_KEY = "comparison_features"
+START_KEY = "start"
+FINISH_KEY = "finish"
+MISTAKES_TABLE_KEY = "mistakes_table"
+DTW_KEY = "dtw"
+FIX_INFO_KEY = "fix_info"
+ERRORS_KEY = "errors"
+ANGLE_NAME_KEY = "angle_name"
+THRESHOLD_KEY = "threshold"
+DTW_OPTIONS = (
+    "global_constraint",
+    "sakoe_chiba_radius",
+    "itakura_max_slope",
+    "max_distance",
+    "reduction",
+)
+
+
+@dataclass(frozen=True)
+class PoseModelConfig:
+    """
+    Validated joints and angles layout of a pose estimation model, with mappings
+    and sequences frozen like its arrays
+    """
+
+    name: str
+    settings: Mapping
+    joint_names: Mapping[int, str]
+    angle_names: Mapping[str, tuple[int, ...]]
+    connections: tuple[tuple[int, ...], ...]
+    angle_columns: tuple[str, ...]
+    angle_ids: Mapping[str, int] = field(repr=False)
+    angle_joint_idxs: np.ndarray = field(repr=False)
+
+    def get_angle_ids(self, angle_columns: list[str], context: str) -> np.ndarray:
+        """
+        Integer ids of angles table columns, failing on names the model lacks
+        """
+        unknown = [name for name in angle_columns if name not in self.angle_ids]
+        if unknown:
+            raise ValueError(f"Unknown angles in {context}: {', '.join(unknown)}")
+        return _read_only(np.array([self.angle_ids[name] for name in angle_columns]))
+
+
+@dataclass(frozen=True)
+class ExerciseConfig:
+    """
+    Validated exercise description with angles used every frame resolved to
+    columns of the pose model's angles table, with mappings and sequences frozen
+    like its arrays
+    """
+
+    name: str
+    segment_angles: tuple[str, ...]
+    comparison_features: tuple[str, ...]
+    start: Mapping[str, float]
+    finish: Mapping[str, float]
+    mistakes_table: Mapping
+    dtw_options: Mapping
+    segmentation_columns: np.ndarray
+    counter_columns: np.ndarray
+    counter_start: np.ndarray
+    counter_finish: np.ndarray
+
+    @property
+    def comparison_angle_columns(self) -> list[str]:
+        return get_angle_columns(self.comparison_features)
+
+
+def compile_pose_model_config(config: dict, name: str) -> PoseModelConfig:
+    if name not in config:
+        raise ValueError(f"Unknown pose estimation model: {name}")
+    model_config = config[name]
+    joint_names = dict(_require(model_config, JOINTS_KEY, name))
+    angle_names = dict(_require(model_config, ANGLES_KEY, name))
+    connections = _require(
+        _require(model_config, CONNECTIONS_KEY, name), VISUALIZED_CONNECTIONS, name
+    )
+
+    for angle_name, angle_joints in angle_names.items():
+        if len(angle_joints) != 3:
+            raise ValueError(f"Angle {angle_name} of {name} must have 3 joints.")
+    unknown_joints = {
+        joint
+        for joints in angle_names.values()
+        for joint in joints
+        if joint not in joint_names
+    }
+    if unknown_joints:
+        raise ValueError(
+            f"Unknown joints in angles of {name}: {sorted(unknown_joints)}"
+        )
+
+    joint_idxs = {joint: idx for idx, joint in enumerate(joint_names)}
+    angle_columns = tuple(get_angle_columns(angle_names))
+    return PoseModelConfig(
+        name=name,
+        settings=_freeze(model_config.get(SETTINGS_KEY, {})),
+        joint_names=_freeze(joint_names),
+        angle_names=_freeze(angle_names),
+        connections=_freeze(list(connections)),
+        angle_columns=angle_columns,
+        angle_ids=_freeze({column: idx for idx, column in enumerate(angle_columns)}),
+        angle_joint_idxs=_read_only(
+            np.array(
+                [
+                    [joint_idxs[joint] for joint in joints]
+                    for joints in angle_names.values()
+                ],
+                dtype=int,
+            ).reshape(-1, 3)
+        ),
+    )
+
+
+def compile_exercise_config(
+    exercise_table: dict, exercise: str, pose_model: PoseModelConfig
+) -> ExerciseConfig:
+    if exercise not in exercise_table:
+        raise ValueError(f"Unknown exercise: {exercise}")
+    exercise_config = exercise_table[exercise]
+    segment_angles = tuple(_require(exercise_config, SEGMENT_ANGLES_KEY, exercise))
+    comparison_features = tuple(
+        _require(exercise_config, COMPARISON_FEATURES_KEY, exercise)
+    )
+    start = dict(_require(exercise_config, START_KEY, exercise))
+    finish = dict(_require(exercise_config, FINISH_KEY, exercise))
+    if start.keys() != finish.keys():
+        raise ValueError(f"Start and finish of {exercise} must use the same angles.")
+
+    mistakes_table = _require(exercise_config, MISTAKES_TABLE_KEY, exercise)
+    dtw_options = dict(exercise_config.get(DTW_KEY, {}))
+    _validate_dtw_options(dtw_options, exercise)
+
+    # Comparison and mistakes tables differ in layout between live, offline and
+    # loaded results, so their processors resolve names once per table
+    pose_model.get_angle_ids(
+        get_angle_columns(comparison_features), f"{exercise} comparison features"
+    )
+    pose_model.get_angle_ids(
+        _get_mistake_angles(mistakes_table), f"{exercise} mistakes table"
+    )
+
+    return ExerciseConfig(
+        name=exercise,
+        segment_angles=segment_angles,
+        comparison_features=comparison_features,
+        start=_freeze(start),
+        finish=_freeze(finish),
+        mistakes_table=_freeze(mistakes_table),
+        dtw_options=_freeze(dtw_options),
+        segmentation_columns=pose_model.get_angle_ids(
+            list(segment_angles), f"{exercise} segment angles"
+        ),
+        counter_columns=pose_model.get_angle_ids(
+            list(start), f"{exercise} start and finish"
+        ),
+        counter_start=_read_only(np.array(list(start.values()), dtype=float)),
+        counter_finish=_read_only(
+            np.array([finish[name] for name in start], dtype=float)
+        ),
+    )
+
+
+def _get_mistake_angles(mistakes_table: dict) -> list[str]:
+    mistake_angles = []
+    for mistake_name, mistake_data in mistakes_table.items():
+        _require(mistake_data, FIX_INFO_KEY, mistake_name)
+        for error in _require(mistake_data, ERRORS_KEY, mistake_name):
+            threshold = _require(error, THRESHOLD_KEY, mistake_name)
+            if isinstance(threshold, bool) or not isinstance(threshold, (int, float)):
+                raise ValueError(f"Threshold of {mistake_name} must be a number.")
+            mistake_angles.append(_require(error, ANGLE_NAME_KEY, mistake_name))
+    return mistake_angles
+
+
+def _validate_dtw_options(dtw_options: dict, exercise: str) -> None:
+    unknown = [option for option in dtw_options if option not in DTW_OPTIONS]
+    if unknown:
+        raise ValueError(f"Unknown dtw options of {exercise}: {', '.join(unknown)}")
+    global_constraint = dtw_options.get("global_constraint")
+    if global_constraint not in GLOBAL_CONSTRAINTS:
+        raise ValueError(f"Unknown global constraint of {exercise}.")
+    if (
+        dtw_options.get("sakoe_chiba_radius") is not None
+        and global_constraint != "sakoe_chiba"
+    ):
+        raise ValueError(
+            f"Sakoe-Chiba radius of {exercise} needs sakoe_chiba constraint."
+        )
+    if (
+        dtw_options.get("itakura_max_slope") is not None
+        and global_constraint != "itakura"
+    ):
+        raise ValueError(f"Itakura max slope of {exercise} needs itakura constraint.")
+    if dtw_options.get("reduction", REDUCTION_POLICIES[0]) not in REDUCTION_POLICIES:
+        raise ValueError(f"Unknown reduction policy of {exercise}.")
+
+
+def _require(config: dict, key: str, context: str):
+    if not isinstance(config, dict) or key not in config:
+        raise ValueError(f"Missing '{key}' in configuration of {context}.")
+    return config[key]
+
+
+def _freeze(value):
+    """
+    Deep read-only copy of configuration values: mappings become
+    `MappingProxyType` and lists tuples
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
@@ -0,0 +1,69 @@
+import os
+import struct
+import tempfile
+import zipfile
+
+import numpy as np
+
+FEATURE_STORE_FILE = "features.npz"
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_LOCAL_HEADER_NAME_LENGTHS = slice(26, 30)
+
+
+def save_features(path: str, arrays: dict[str, np.ndarray]) -> None:
+    """
+    Write all arrays into a single uncompressed archive in one bulk operation
+    """
+    output_dir = os.path.dirname(path) or "."
+    with tempfile.NamedTemporaryFile(
+        dir=output_dir, suffix=".tmp", delete=False
+    ) as file:
+        np.savez(file, **arrays)
+    os.replace(file.name, path)
+
+
+def load_features(path: str, mmap: bool = True) -> dict[str, np.ndarray]:
+    """
+    Load arrays saved with `save_features`, memory-mapped straight from the archive
+    unless `mmap` is False
+    """
+    if not mmap:
+        with np.load(path) as archive:
+            return {name: archive[name] for name in archive.files}
+
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Compressed array can't be memory-mapped: {path}")
+            name = info.filename.removesuffix(".npy")
+            arrays[name] = _map_array(path, file, info.header_offset)
+    return arrays
+
+
+def _map_array(path: str, file, header_offset: int) -> np.ndarray:
+    file.seek(header_offset)
+    local_header = file.read(ZIP_LOCAL_HEADER_SIZE)
+    name_length, extra_length = struct.unpack(
+        "<HH", local_header[ZIP_LOCAL_HEADER_NAME_LENGTHS]
+    )
+    file.seek(header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+
+    version = np.lib.format.read_magic(file)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+
+    if dtype.hasobject:
+        raise ValueError(f"Object array can't be memory-mapped: {path}")
+    if not np.prod(shape):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=file.tell(),
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
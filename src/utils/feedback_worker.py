@@ -0,0 +1,79 @@
+import logging
+import queue
+import threading
+
+from models.angle import AnglesTable
+from models.mistake import Mistake
+from models.segment import Segment
+from processors.mistakes_processor import MistakesProcessor
+from processors.results_processor import ResultsProcessor
+
+END_OF_STREAM = object()
+
+
+class FeedbackWorker:
+    """
+    Background thread comparing completed repetitions with the reference.
+    Segments are submitted without blocking and feedback is collected by polling,
+    so the capture loop never waits for the comparison. A repetition whose
+    comparison fails is logged and kept with empty results and no feedback, so
+    the session's other repetitions are still compared and saved.
+    """
+
+    def __init__(
+        self,
+        results_processor: ResultsProcessor,
+        mistakes_processor: MistakesProcessor,
+    ) -> None:
+        self.results_processor = results_processor
+        self.mistakes_processor = mistakes_processor
+        self.logger = logging.getLogger(__name__)
+        self.failed_repetitions: list[int] = []
+        self._segments: queue.Queue = queue.Queue()
+        self._feedback: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self.__run, daemon=True)
+        self._thread.start()
+
+    def submit(self, segment: Segment) -> None:
+        self._segments.put_nowait(segment)
+
+    def poll(self) -> list[tuple[int, list[Mistake]]]:
+        """
+        Feedback for repetitions compared since the last call as (rep, mistakes)
+        """
+        feedback = []
+        while True:
+            try:
+                feedback.append(self._feedback.get_nowait())
+            except queue.Empty:
+                return feedback
+
+    def close(self) -> None:
+        """
+        Finish comparing submitted repetitions and stop the thread
+        """
+        self._segments.put_nowait(END_OF_STREAM)
+        self._thread.join()
+
+    def __run(self) -> None:
+        while True:
+            segment = self._segments.get()
+            if segment is END_OF_STREAM:
+                return
+            try:
+                results = self.results_processor.process(segment)
+                mistakes = self.mistakes_processor.process(results)
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.logger.exception(
+                    "Comparison of repetition %s failed ❌", segment.rep
+                )
+                self.failed_repetitions.append(segment.rep)
+                self.results_processor.update(
+                    AnglesTable(self.results_processor.angle_columns, capacity=0)
+                )
+                self.mistakes_processor.update([])
+                continue
+
+            self.results_processor.update(results)
+            self.mistakes_processor.update(mistakes)
+            self._feedback.put_nowait((segment.rep, mistakes))
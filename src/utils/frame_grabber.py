@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Any
+
+import cv2
+
+CAPTURE_POLL_TIMEOUT = 0.1
+
+
+class FrameGrabber:
+    """
+    Capture thread keeping only the newest frame, so a consumer slower than the
+    camera always processes the latest picture instead of a growing backlog.
+    Video files are read at their own frame rate to behave like a camera.
+    Frames are numbered by the grabber itself and stamped with `time.monotonic()`
+    on capture, since cameras do not report positions in the stream.
+    """
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        realtime_fps: float | None = None,
+        target_fps: float | None = None,
+        max_latency: float | None = None,
+    ) -> None:
+        self.cap = cap
+        self.realtime_fps = realtime_fps
+        self.target_fps = target_fps
+        self.max_latency = max_latency
+
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.stale_frames = 0
+
+        self._latest: tuple[int, float, Any] | None = None
+        self._finished = False
+        self._last_read_time: float | None = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self.__capture, daemon=True)
+        self._thread.start()
+
+    def read(self) -> tuple[int, float, Any] | None:
+        """
+        Wait for a frame newer than the previously read one and return it with its
+        frame number and capture time, or None when the stream has ended
+        """
+        self.__throttle()
+        while True:
+            with self._condition:
+                while self._latest is None and not self._finished:
+                    self._condition.wait(CAPTURE_POLL_TIMEOUT)
+                if self._latest is None:
+                    return None
+                frame_number, capture_time, frame = self._latest
+                self._latest = None
+
+            if self.max_latency and time.monotonic() - capture_time > self.max_latency:
+                self.stale_frames += 1
+                continue
+            self._last_read_time = time.monotonic()
+            return frame_number, capture_time, frame
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def __throttle(self) -> None:
+        if not self.target_fps or self._last_read_time is None:
+            return
+        delay = self._last_read_time + 1 / self.target_fps - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def __capture(self) -> None:
+        frame_interval = 1 / self.realtime_fps if self.realtime_fps else 0
+        next_capture_time = time.monotonic()
+        try:
+            while not self._stop_event.is_set() and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                capture_time = time.monotonic()
+
+                with self._condition:
+                    if self._latest is not None:
+                        self.dropped_frames += 1
+                    self.captured_frames += 1
+                    self._latest = (self.captured_frames, capture_time, frame)
+                    self._condition.notify()
+
+                next_capture_time += frame_interval
+                self._stop_event.wait(max(next_capture_time - time.monotonic(), 0))
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from models.joint import JointsTable
+
+DEFAULT_CACHE_DIR = ".cache/landmarks"
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+HASH_CHUNK_SIZE = 1024**2
+CACHE_FILE_EXTENSION = ".npz"
+
+
+class LandmarksCache:
+    """
+    Content-addressed on-disk cache of extracted joints with size-bounded LRU eviction
+    """
+
+    def __init__(
+        self,
+        model_settings: dict,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.model_settings = json.dumps(model_settings, sort_keys=True)
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, video_path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(video_path, "rb") as file:
+            while chunk := file.read(HASH_CHUNK_SIZE):
+                file_hash.update(chunk)
+        file_hash.update(self.model_settings.encode())
+        return file_hash.hexdigest()
+
+    def load(self, key: str) -> JointsTable | None:
+        """
+        Cached joints, or None on a miss. Truncated or corrupted entries are
+        removed and treated as misses, so joints are extracted again.
+        """
+        path = self.__get_path(key)
+        try:
+            with np.load(path) as cached:
+                joints = JointsTable.from_arrays(
+                    ids=cached["ids"].tolist(),
+                    names=cached["names"].tolist(),
+                    frames=cached["frames"],
+                    values=cached["values"],
+                    valid=cached["valid"] if "valid" in cached.files else None,
+                )
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (zipfile.BadZipFile, EOFError, OSError, KeyError, ValueError):
+            self.__remove(path)
+            return None
+        return joints
+
+    def save(self, key: str, joints: JointsTable) -> None:
+        with tempfile.NamedTemporaryFile(
+            dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as file:
+            np.savez(
+                file,
+                ids=np.array(joints.ids),
+                names=np.array(joints.names),
+                frames=joints.frames,
+                values=joints.values,
+                valid=joints.valid,
+            )
+        os.replace(file.name, self.__get_path(key))
+        self.__evict()
+
+    def __get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXTENSION)
+
+    def __evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(CACHE_FILE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+            self.__remove(path)
+            cache_size -= size
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+from models.joint import JointsTable
+
+MIN_VISIBILITY = 0.5
+MIN_VISIBLE_RATIO = 0.5
+MAX_GAP_SECONDS = 0.25
+
+
+class FrameClock:
+    """
+    Frame numbers of a video based on decoding timestamps rather than on decoding
+    order, so frames missing from variable frame rate recordings leave gaps in the
+    time axis instead of shifting all following frames
+    """
+
+    def __init__(self, cap: cv2.VideoCapture) -> None:
+        self.cap = cap
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        self.__last_frame = 0
+
+    def frame_number(self) -> int:
+        """
+        Number of the frame read last, counted from 1 like CAP_PROP_POS_FRAMES
+        """
+        frame_number = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        if self.fps > 0 and timestamp > 0:
+            frame_number = round(timestamp * self.fps / 1000) + 1
+        frame_number = max(frame_number, self.__last_frame + 1)
+        self.__last_frame = frame_number
+        return frame_number
+
+
+def get_max_gap(fps: float, frame_stride: int = 1) -> int:
+    """
+    Longest gap in frames that is interpolated instead of breaking the recording
+    """
+    return max(int(fps * MAX_GAP_SECONDS), frame_stride, 1)
+
+
+def fill_missing(
+    joints: JointsTable, max_gap: int, min_visibility: float = MIN_VISIBILITY
+) -> JointsTable:
+    """
+    Copy of joints with frames without detected pose and short drops of joints
+    below min_visibility interpolated over gaps up to max_gap frames. Only frames
+    in which pose was detected with every joint visible stay valid.
+    Joints occluded in most of the frames, like the far side of the body in side
+    view, keep estimated coordinates and do not affect validity.
+    """
+    if not joints:
+        return joints
+
+    frames = joints.frames
+    visible = joints.visibility >= min_visibility
+    reliable_joints = np.flatnonzero(visible.mean(axis=0) >= MIN_VISIBLE_RATIO)
+    visible = visible[:, reliable_joints]
+
+    values = joints.values.copy()
+    for joint_idx, joint_visible in zip(reliable_joints, visible.T):
+        if joint_visible.all():
+            continue
+        visible_idxs = np.flatnonzero(joint_visible)
+        visible_frames = frames[visible_idxs]
+        hidden_idxs = np.flatnonzero(~joint_visible)
+        next_idxs = np.searchsorted(visible_frames, frames[hidden_idxs])
+        inside = (next_idxs > 0) & (next_idxs < len(visible_frames))
+        next_idxs = np.minimum(next_idxs, len(visible_frames) - 1)
+        gaps = visible_frames[next_idxs] - visible_frames[np.maximum(next_idxs - 1, 0)]
+        hidden_idxs = hidden_idxs[inside & (gaps <= max_gap)]
+
+        for coordinate in range(3):
+            values[hidden_idxs, joint_idx, coordinate] = np.interp(
+                frames[hidden_idxs],
+                visible_frames,
+                values[visible_idxs, joint_idx, coordinate],
+            )
+
+    filled = JointsTable.from_arrays(
+        joints.ids, joints.names, frames, values, joints.valid & visible.all(axis=1)
+    )
+    return filled.fill_gaps(max_gap)
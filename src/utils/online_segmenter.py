@@ -0,0 +1,118 @@
+import numpy as np
+
+from models.angle import AnglesTable
+from models.frame_table import FrameTable
+from models.joint import JointsTable
+from models.segment import Segment
+from processors.segments_processor import create_segment
+
+DEFAULT_LOOK_AHEAD = 0.25
+DEFAULT_WARMUP = 1.0
+DEFAULT_MIN_AMPLITUDE = 10.0
+
+
+class OnlineSegmenter:
+    """
+    Incremental counterpart of `SegmentsProcessor` for live streams.
+    Consumes frames as they are appended to the joints and angles tables and emits
+    a repetition as soon as the peak closing it is confirmed.
+    Extrema are only classified after `warmup` seconds of signal, so the running
+    mean they are compared with does not sit on the first few frames, and a
+    repetition needs its valley `min_amplitude` degrees below both of its peaks.
+    """
+
+    def __init__(
+        self,
+        fps: int,
+        segmentation_columns: np.ndarray,
+        look_ahead: float = DEFAULT_LOOK_AHEAD,
+        warmup: float = DEFAULT_WARMUP,
+        min_amplitude: float = DEFAULT_MIN_AMPLITUDE,
+    ) -> None:
+        """
+        `segmentation_columns` are compiled ids of segmentation angles in the
+        angles table of the pose model
+        """
+        self.segmentation_columns = segmentation_columns
+        self.look_ahead_frames = max(int(fps * look_ahead), 1)
+        self.warmup_frames = max(int(fps * warmup), self.look_ahead_frames + 1)
+        self.min_amplitude = min_amplitude
+        self.repetitions_count = 0
+
+        self._signal = FrameTable(())
+        self._signal_sum = 0.0
+        self._next_candidate = 0
+        self._last_peak: int | None = None
+        self._valley: float | None = None
+
+    def process(self, data: tuple[JointsTable, AnglesTable]) -> list[Segment]:
+        """
+        Consume rows appended to the tables since the last call and return
+        repetitions completed in them
+        """
+        joints, angles = data
+        segments = []
+        for idx in range(len(self._signal), len(angles)):
+            value = angles.values[idx, self.segmentation_columns].mean()
+            self._signal.append(angles.frames[idx], value)
+            self._signal_sum += value
+            if len(self._signal) < self.warmup_frames:
+                continue
+
+            # Candidates held back during warm-up are classified at its end
+            while self._next_candidate <= idx - self.look_ahead_frames:
+                segment_idxs = self.__consume_extremum(self._next_candidate)
+                self._next_candidate += 1
+                if segment_idxs:
+                    segments.append(
+                        self.__create_segment(joints, angles, *segment_idxs)
+                    )
+        return segments
+
+    def __consume_extremum(self, candidate_idx: int) -> tuple[int, int] | None:
+        window_start = max(candidate_idx - self.look_ahead_frames, 0)
+        window = self._signal.values[
+            window_start : candidate_idx + self.look_ahead_frames + 1
+        ]
+        value = window[candidate_idx - window_start]
+        zero_point = self._signal_sum / len(self._signal)
+
+        is_peak = window_start + np.argmax(window) == candidate_idx
+        is_valley = window_start + np.argmin(window) == candidate_idx
+        if is_valley and value <= zero_point:
+            if self._last_peak is not None:
+                self._valley = min(value, self._valley or value)
+        elif is_peak and value >= zero_point:
+            return self.__consume_peak(candidate_idx)
+        return None
+
+    def __consume_peak(self, peak_idx: int) -> tuple[int, int] | None:
+        last_peak = self._last_peak
+        if last_peak is None:
+            self._last_peak = peak_idx
+            return None
+        peaks = self._signal.values[[last_peak, peak_idx]]
+        if self._valley is None or peaks.min() - self._valley < self.min_amplitude:
+            self._last_peak = (last_peak + peak_idx) // 2
+            return None
+
+        self._last_peak = peak_idx
+        self._valley = None
+        return last_peak, peak_idx
+
+    def __create_segment(
+        self, joints: JointsTable, angles: AnglesTable, start_idx: int, finish_idx: int
+    ) -> Segment:
+        self.repetitions_count += 1
+        joints_aligned = len(joints) >= finish_idx + 1 and (
+            joints.frames[start_idx] == angles.frames[start_idx]
+            and joints.frames[finish_idx] == angles.frames[finish_idx]
+        )
+        return create_segment(
+            joints,
+            angles,
+            self.repetitions_count,
+            start_idx,
+            finish_idx,
+            joints_aligned,
+        )
@@ -0,0 +1,90 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+DEFAULT_QUEUE_SIZE = 8
+QUEUE_POLL_TIMEOUT = 0.1
+
+END_OF_STREAM = object()
+
+
+class Pipeline:
+    """
+    Chain of threaded stages connected by bounded queues.
+    Iterating over the pipeline consumes the output of the last stage.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.queue_size = queue_size
+        self._threads: list[threading.Thread] = []
+        self._errors: list[Exception] = []
+        self._stop_event = threading.Event()
+        self._output: queue.Queue | None = None
+
+    def source(self, items: Iterable) -> "Pipeline":
+        """
+        Produce items from iterable in a separate thread
+        """
+        return self.__start(iter(items))
+
+    def stage(self, process: Callable[[Any], Any]) -> "Pipeline":
+        """
+        Apply `process` to every item of the previous stage in a separate thread.
+        Items for which `process` returns None are dropped.
+        """
+        if self._output is None:
+            raise ValueError("Pipeline has no source stage.")
+        return self.__start(map(process, self.__drain(self._output)))
+
+    def __iter__(self) -> Iterator:
+        if self._output is None:
+            raise ValueError("Pipeline has no source stage.")
+        try:
+            yield from self.__drain(self._output)
+        finally:
+            self._stop_event.set()
+            for thread in self._threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+
+    def __start(self, items: Iterator) -> "Pipeline":
+        output = queue.Queue(maxsize=self.queue_size)
+        thread = threading.Thread(
+            target=self.__run_stage, args=(items, output), daemon=True
+        )
+        self._threads.append(thread)
+        self._output = output
+        thread.start()
+        return self
+
+    def __run_stage(self, items: Iterator, output: queue.Queue) -> None:
+        try:
+            for item in items:
+                if item is not None and not self.__put(output, item):
+                    return
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self._errors.append(error)
+            self._stop_event.set()
+        finally:
+            self.__put(output, END_OF_STREAM)
+
+    def __drain(self, input_queue: queue.Queue) -> Iterator:
+        while not self._stop_event.is_set():
+            try:
+                item = input_queue.get(timeout=QUEUE_POLL_TIMEOUT)
+            except queue.Empty:
+                continue
+            if item is END_OF_STREAM:
+                return
+            yield item
+
+    def __put(self, output: queue.Queue, item: Any) -> bool:
+        while not self._stop_event.is_set():
+            try:
+                output.put(item, timeout=QUEUE_POLL_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,92 @@
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+POSE_ESTIMATORS: dict[str, Callable[..., Any]] = {}
+
+
+def register_pose_estimator(name: str) -> Callable:
+    """
+    Register factory of pose estimators exposing `process(frame)` with
+    `pose_landmarks` and `pose_world_landmarks` results, and `close()`
+    """
+
+    def register(factory: Callable[..., Any]) -> Callable[..., Any]:
+        POSE_ESTIMATORS[name] = factory
+        return factory
+
+    return register
+
+
+@register_pose_estimator("mediapipe")
+def create_mediapipe_pose(**settings) -> Any:
+    import mediapipe as mp  # pylint: disable=import-outside-toplevel
+
+    return mp.solutions.pose.Pose(**settings)
+
+
+def create_pose_estimator(name: str, settings: dict) -> Any:
+    try:
+        factory = POSE_ESTIMATORS[name]
+    except KeyError:
+        raise ValueError(f"No pose estimator registered for: {name}") from None
+    return factory(**settings)
+
+
+class PoseEstimatorPool:
+    """
+    Process-wide pool of loaded pose estimators reused between analyses,
+    so the model is loaded once per process and settings
+    """
+
+    def __init__(self) -> None:
+        self._idle: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str, settings: dict) -> Any:
+        with self._lock:
+            idle = self._idle.get(self.__key(name, settings))
+            if idle:
+                return idle.pop()
+        return create_pose_estimator(name, settings)
+
+    def release(self, name: str, settings: dict, estimator: Any) -> None:
+        """
+        Return estimator to the pool with its tracking state cleared
+        """
+        reset = getattr(estimator, "reset", None)
+        if reset:
+            reset()
+        with self._lock:
+            self._idle.setdefault(self.__key(name, settings), []).append(estimator)
+
+    @contextmanager
+    def estimator(self, name: str, settings: dict) -> Iterator[Any]:
+        estimator = self.acquire(name, settings)
+        try:
+            yield estimator
+        finally:
+            self.release(name, settings, estimator)
+
+    def warm_up(self, name: str, settings: dict, count: int = 1) -> None:
+        """
+        Load estimators ahead of the first analysis
+        """
+        estimators = [self.acquire(name, settings) for _ in range(count)]
+        for estimator in estimators:
+            self.release(name, settings, estimator)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for estimators in idle.values():
+            for estimator in estimators:
+                estimator.close()
+
+    @staticmethod
+    def __key(name: str, settings: dict) -> str:
+        return json.dumps([name, settings], sort_keys=True)
+
+
+POSE_ESTIMATOR_POOL = PoseEstimatorPool()
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from models.segment import Segment
+from processors.segments_processor import SegmentsProcessor
+from utils.dtw import fill_nan
+
+REFERENCE_INDEX_FILE = "reference_index.npz"
+
+
+@dataclass
+class ReferenceIndex:
+    """
+    Reference repetition with its comparison angles laid out contiguously for DTW,
+    together with their global lower and upper bounds. NaN angles of degenerate
+    projections are interpolated in `dtw_values`, which DTW and bounds are
+    computed on, while `values` keep them for differences.
+    """
+
+    segment: Segment
+    angle_columns: list[str]
+    values: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    dtw_values: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.dtw_values = fill_nan(self.values)
+
+    @classmethod
+    def build(cls, segment: Segment, angle_columns: list[str]) -> "ReferenceIndex":
+        values = np.ascontiguousarray(segment.angles.columns(angle_columns))
+        dtw_values = fill_nan(values)
+        return cls(
+            segment=segment,
+            angle_columns=list(angle_columns),
+            values=values,
+            lower=dtw_values.min(axis=0),
+            upper=dtw_values.max(axis=0),
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        return {
+            **SegmentsProcessor.to_arrays([self.segment]),
+            "index_angle_columns": np.array(self.angle_columns),
+            "index_values": self.values,
+            "index_lower": self.lower,
+            "index_upper": self.upper,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "ReferenceIndex":
+        return cls(
+            segment=SegmentsProcessor.from_arrays(arrays)[0],
+            angle_columns=arrays["index_angle_columns"].tolist(),
+            values=arrays["index_values"],
+            lower=arrays["index_lower"],
+            upper=arrays["index_upper"],
+        )
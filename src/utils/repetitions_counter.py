@@ -1,38 +1,90 @@
 import numpy as np
 
-from models.angle import Angle
+from models.repetition import Repetition
+from utils.exercise_config import ExerciseConfig
+
+DEFAULT_SMOOTHING = 0.0
+DEFAULT_HYSTERESIS = 0.0
 
 
 class RepetitionsCounter:
     """
-    Counter of repetitions in live app
+    Counter of repetitions in live app.
+    Reference angles and their columns are resolved once, so every frame only
+    gathers a few values from the angles row into preallocated buffers.
+    Phases are timed with capture timestamps in seconds, because frame positions
+    are not reported by cameras.
     """
 
-    def __init__(self, exercise_phases: str) -> None:
-        self.start_angles = exercise_phases["start"]
-        self.finish_angles = exercise_phases["finish"]
+    def __init__(
+        self,
+        exercise_config: ExerciseConfig,
+        smoothing: float = DEFAULT_SMOOTHING,
+        hysteresis: float = DEFAULT_HYSTERESIS,
+    ) -> None:
+        if not 0.0 <= smoothing < 1.0:
+            raise ValueError(f"Smoothing must be in [0, 1): {smoothing}")
+        if not 0.0 <= hysteresis < 0.5:
+            raise ValueError(f"Hysteresis must be in [0, 0.5): {hysteresis}")
+        self.smoothing = smoothing
+        self.down_threshold = 1.0 - hysteresis
+        self.up_threshold = hysteresis
+
+        self.__columns = exercise_config.counter_columns
+        self.__start_angles = exercise_config.counter_start
+        self.__angles_range = (
+            exercise_config.counter_start - exercise_config.counter_finish
+        )
+        self.__angles = np.empty(len(self.__columns))
 
         self.repetitions_count = 0
+        self.repetitions: list[Repetition] = []
         self.state = "up"
+        self.progress = 0.0
+        self.__start: tuple[int, float] | None = None
+        self.__bottom: tuple[int, float] = (0, 0.0)
 
-    def process(self, data: list[Angle]) -> list:
-        reference_angle_names = list(self.start_angles.keys())
-        start_reference_angles = np.array(list(self.start_angles.values()))
-        finish_reference_angles = np.array(list(self.finish_angles.values()))
-
-        data_angles = np.array(
-            [angle.value for angle in data if angle.name in reference_angle_names]
-        )
-
-        reference_progress = start_reference_angles[0] - finish_reference_angles[0]
+    def process(self, data: np.ndarray) -> float:
+        """
+        Progress of the current repetition from the newest row of angles table
+        """
+        np.take(data, self.__columns, out=self.__angles)
+        np.subtract(self.__start_angles, self.__angles, out=self.__angles)
+        np.divide(self.__angles, self.__angles_range, out=self.__angles)
+        progress = min(max(float(self.__angles.mean()), 0.0), 1.0)
 
-        progress = np.mean(start_reference_angles - data_angles)
-        progress_normalized = progress / reference_progress
-        return np.clip(progress_normalized, 0, 1)
+        if self.smoothing:
+            progress += self.smoothing * (self.progress - progress)
+        self.progress = progress
+        return progress
 
-    def update(self, progress) -> None:
-        if progress >= 1.0 and self.state == "up":
-            self.state = "down"
-        elif progress <= 0.0 and self.state == "down":
+    def update(
+        self, progress: float, frame_number: int, timestamp: float
+    ) -> Repetition | None:
+        """
+        Move between phases of the exercise, returning the finished repetition.
+        `timestamp` is the capture time of the frame in seconds.
+        """
+        if self.state == "up":
+            if progress <= self.up_threshold or self.__start is None:
+                self.__start = (frame_number, timestamp)
+            if progress >= self.down_threshold:
+                self.state = "down"
+                self.__bottom = (frame_number, timestamp)
+        elif progress <= self.up_threshold:
             self.repetitions_count += 1
             self.state = "up"
+            start_frame, start_time = self.__start
+            bottom_frame, bottom_time = self.__bottom
+            repetition = Repetition(
+                rep=self.repetitions_count,
+                start_frame=start_frame,
+                bottom_frame=bottom_frame,
+                finish_frame=frame_number,
+                eccentric_time=bottom_time - start_time,
+                concentric_time=timestamp - bottom_time,
+            )
+            self.repetitions.append(repetition)
+            self.__start = (frame_number, timestamp)
+            return repetition
+        return None
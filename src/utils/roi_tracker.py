@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+ROI_MARGIN = 0.25
+ROI_MIN_AREA_RATIO = 0.5
+
+
+class RoiTracker:
+    """
+    Crops frames to the person found in the previous frame and downscales them to
+    the inference resolution, then maps normalized landmarks back to the original
+    frame. World landmarks are metric and centered on hips, so they don't depend
+    on the crop.
+    """
+
+    def __init__(self, inference_size: int, margin: float = ROI_MARGIN) -> None:
+        self.inference_size = inference_size
+        self.margin = margin
+        self._roi: np.ndarray | None = None
+
+    def process(self, pose_estimation_model, frame: np.ndarray):
+        """
+        Run pose estimation on the region of interest of the frame
+        """
+        height, width = frame.shape[:2]
+        x_start, y_start, x_stop, y_stop = self.__get_roi_pixels(width, height)
+        crop = frame[y_start:y_stop, x_start:x_stop]
+
+        scale = self.inference_size / max(crop.shape[:2])
+        if scale < 1:
+            crop = cv2.resize(
+                crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+
+        results = pose_estimation_model.process(crop)
+        landmarks = results.pose_landmarks
+        if not landmarks:
+            self._roi = None
+            return results
+
+        crop_width, crop_height = x_stop - x_start, y_stop - y_start
+        for landmark in landmarks.landmark:
+            landmark.x = (x_start + landmark.x * crop_width) / width
+            landmark.y = (y_start + landmark.y * crop_height) / height
+        self.__update_roi(landmarks)
+        return results
+
+    def __get_roi_pixels(self, width: int, height: int) -> tuple[int, int, int, int]:
+        if self._roi is None:
+            return 0, 0, width, height
+        x_start, y_start, x_stop, y_stop = self._roi
+        return (
+            int(x_start * width),
+            int(y_start * height),
+            max(int(np.ceil(x_stop * width)), int(x_start * width) + 1),
+            max(int(np.ceil(y_stop * height)), int(y_start * height) + 1),
+        )
+
+    def __update_roi(self, landmarks) -> None:
+        """
+        Move the region only when the person leaves it or fills much less of it,
+        so the pose tracker sees a stable picture between frames
+        """
+        points = np.array([(landmark.x, landmark.y) for landmark in landmarks.landmark])
+        low, high = np.clip(points.min(axis=0), 0, 1), np.clip(points.max(axis=0), 0, 1)
+        if self._roi is not None:
+            inside = np.all(low >= self._roi[:2]) and np.all(high <= self._roi[2:])
+            roi_area = np.prod(self._roi[2:] - self._roi[:2])
+            if (
+                inside
+                and np.prod(high - low)
+                >= ROI_MIN_AREA_RATIO * roi_area / (1 + 2 * self.margin) ** 2
+            ):
+                return
+
+        padding = (high - low) * self.margin
+        self._roi = np.concatenate(
+            [np.clip(low - padding, 0, 1), np.clip(high + padding, 0, 1)]
+        )
@@ -0,0 +1,135 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from models.joint import JointsTable
+from processors.joints_processor import JointsProcessor
+from utils.missing_data import FrameClock
+from utils.pose_estimators import POSE_ESTIMATOR_POOL
+from utils.roi_tracker import RoiTracker
+
+DEFAULT_WARMUP_FRAMES = 15
+
+
+def split_frame_ranges(
+    frames_num: int, shards_num: int, warmup_frames: int = DEFAULT_WARMUP_FRAMES
+) -> list[tuple[int, int, int | None]]:
+    """
+    Split video into (warmup_start, start, stop) frame positions, where frames in
+    [warmup_start, start) are only used to warm up the pose tracker.
+    The last range has no stop and is read to the end of the video, because
+    CAP_PROP_FRAME_COUNT is only an estimate for many containers. Without a
+    positive frame count the whole video is a single range.
+    """
+    if frames_num <= 0:
+        return [(0, 0, None)]
+    bounds = np.linspace(0, frames_num, min(shards_num, frames_num) + 1, dtype=int)
+    stops = [int(stop) for stop in bounds[1:-1]] + [None]
+    return [
+        (max(start - warmup_frames, 0), start, stop)
+        for start, stop in zip(bounds[:-1], stops)
+    ]
+
+
+def extract_shard(
+    video_path: str,
+    joint_names: dict,
+    frame_range: tuple[int, int, int | None],
+    pose_model: str,
+    pose_estimation_settings: dict,
+    inference_size: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Extract joints from one frame range with the worker's own pose estimation model
+    """
+    with POSE_ESTIMATOR_POOL.estimator(
+        pose_model, pose_estimation_settings
+    ) as pose_estimation_model:
+        return _extract_frame_range(
+            video_path, joint_names, frame_range, pose_estimation_model, inference_size
+        )
+
+
+def _extract_frame_range(
+    video_path: str,
+    joint_names: dict,
+    frame_range: tuple[int, int, int | None],
+    pose_estimation_model,
+    inference_size: int | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    warmup_start, start, stop = frame_range
+    joints_processor = JointsProcessor(joint_names)
+    roi_tracker = RoiTracker(inference_size) if inference_size else None
+
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+    frame_clock = FrameClock(cap)
+    while cap.isOpened():
+        ret, frame = cap.read()
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if not ret or (stop is not None and position > stop):
+            break
+
+        if roi_tracker:
+            results = roi_tracker.process(pose_estimation_model, frame)
+        else:
+            results = pose_estimation_model.process(frame)
+        world_landmarks = results.pose_world_landmarks
+        frame_number = frame_clock.frame_number()
+        if world_landmarks and position > start:
+            JointsProcessor.current_processing_frame = frame_number
+            joints = joints_processor.process(world_landmarks)
+            joints_processor.update(joints)
+
+    cap.release()
+    return joints_processor.data.frames, joints_processor.data.values
+
+
+def extract_sharded(
+    video_path: str,
+    joint_names: dict,
+    frames_num: int,
+    workers: int,
+    pose_model: str,
+    pose_estimation_settings: dict,
+    warmup_frames: int = DEFAULT_WARMUP_FRAMES,
+    inference_size: int | None = None,
+) -> JointsTable:
+    """
+    Extract joints from a video split into frame ranges processed in parallel,
+    stitched back in frame order. A single range is extracted in this process.
+    """
+    frame_ranges = split_frame_ranges(frames_num, workers, warmup_frames)
+    joints = JointsTable(list(joint_names.keys()), list(joint_names.values()))
+    if len(frame_ranges) == 1:
+        joints.extend(
+            *extract_shard(
+                video_path,
+                joint_names,
+                frame_ranges[0],
+                pose_model,
+                pose_estimation_settings,
+                inference_size,
+            )
+        )
+        return joints
+
+    with ProcessPoolExecutor(
+        max_workers=len(frame_ranges),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        shards = executor.map(
+            extract_shard,
+            [video_path] * len(frame_ranges),
+            [joint_names] * len(frame_ranges),
+            frame_ranges,
+            [pose_model] * len(frame_ranges),
+            [pose_estimation_settings] * len(frame_ranges),
+            [inference_size] * len(frame_ranges),
+        )
+        for frames, values in shards:
+            joints.extend(frames, values)
+
+    return joints
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+from scipy.signal import butter, filtfilt
+
+from models.joint import JointsTable
+
+DEFAULT_BETA = 10.0
+DEFAULT_DERIVATIVE_CUTOFF = 1.0
+BUTTERWORTH_ORDER = 2
+
+
+class OneEuroFilter:
+    """
+    One Euro filter of joint coordinates for live streams: a low-pass filter whose
+    cutoff rises with the speed of every coordinate, so slow jitter is removed and
+    fast motion is followed without lag. Keeps fixed state of the last frame only.
+    """
+
+    def __init__(
+        self,
+        fps: float,
+        min_cutoff: float,
+        beta: float = DEFAULT_BETA,
+        derivative_cutoff: float = DEFAULT_DERIVATIVE_CUTOFF,
+    ) -> None:
+        self.fps = fps
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+
+        self.__last_frame: int | None = None
+        self.__values: np.ndarray | None = None
+        self.__derivatives: np.ndarray | None = None
+        self.__buffer: np.ndarray | None = None
+
+    def process(self, frame_number: int, values: np.ndarray) -> np.ndarray:
+        """
+        Filter coordinates of the frame in place
+        """
+        if self.__values is None:
+            self.__values = values.copy()
+            self.__derivatives = np.zeros_like(values)
+            self.__buffer = np.empty_like(values)
+            self.__last_frame = frame_number
+            return values
+
+        elapsed = max(frame_number - self.__last_frame, 1) / self.fps
+        self.__last_frame = frame_number
+        buffer = self.__buffer
+
+        np.subtract(values, self.__values, out=buffer)
+        buffer /= elapsed
+        buffer -= self.__derivatives
+        buffer *= self.__smoothing_factor(self.derivative_cutoff, elapsed)
+        self.__derivatives += buffer
+
+        np.abs(self.__derivatives, out=buffer)
+        buffer *= self.beta
+        buffer += self.min_cutoff
+        buffer *= 2 * math.pi * elapsed
+        buffer += 1
+        np.reciprocal(buffer, out=buffer)
+        np.subtract(1, buffer, out=buffer)
+
+        values -= self.__values
+        values *= buffer
+        self.__values += values
+        values[...] = self.__values
+        return values
+
+    @staticmethod
+    def __smoothing_factor(cutoff: float, elapsed: float) -> float:
+        rate = 2 * math.pi * cutoff * elapsed
+        return rate / (rate + 1)
+
+
+def filter_zero_phase(joints: JointsTable, fps: float, cutoff: float) -> JointsTable:
+    """
+    Copy of joints with coordinates low-pass filtered forward and backward, which
+    removes jitter without shifting peaks and valleys of the movement in time
+    """
+    if fps <= 0 or cutoff >= fps / 2:
+        return joints
+    numerator, denominator = butter(BUTTERWORTH_ORDER, cutoff, fs=fps)
+    if len(joints) <= 3 * max(len(numerator), len(denominator)):
+        return joints
+
+    values = joints.values.copy()
+    values[..., :3] = filtfilt(numerator, denominator, joints.coordinates, axis=0)
+    return JointsTable.from_arrays(
+        joints.ids, joints.names, joints.frames, values, joints.valid
+    )
@@ -1,3 +1,4 @@
+import cv2
 import matplotlib.pyplot as plt
 import mediapipe as mp
 import numpy as np
@@ -19,14 +20,55 @@ CONNECTIONS_COLOR = (245, 255, 230)
 CONFIG_PATH = "configs/config.yaml"
 PROGRESS_BAR_VERTICES = ([1.2, 1, 0.2], [1.2, -1, 0.2], [2, -1, 0.2], [2, 1, 0.2])
 INSTRUCTION_MAPPER = {"up": "Go down!", "down": "Go up!"}
+VISUALIZATION_MODES = ("figure", "overlay", "headless")
+VISIBILITY_THRESHOLD = 0.1
+EMPTY_SEGMENT = [[0, 0, 0], [0, 0, 0]]
+
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_FONT_SCALE = 0.5
+OVERLAY_LINE_HEIGHT = 18
+OVERLAY_MARGIN = 10
+OVERLAY_TEXT_COLOR = (255, 255, 255)
+OVERLAY_FEEDBACK_COLOR = (0, 0, 255)
+OVERLAY_PROGRESS_BAR_SIZE = (20, 200)
 
 mp_drawing = mp.solutions.drawing_utils
 
 
 class Visualizer:
-    def __init__(self, connections: dict) -> None:
-        self.figure, self.axis = self.__initialize_figure()
+    """
+    Live view of the exercise: 3D skeleton figure, overlay drawn on the video frame
+    or nothing at all (headless). Figure artists are created once and only their
+    data is updated every frame.
+    """
+
+    def __init__(self, connections: dict, mode: str = "figure") -> None:
+        if mode not in VISUALIZATION_MODES:
+            raise ValueError(f"Unknown visualization mode: {mode}")
         self.connections = connections
+        self.mode = mode
+        if mode == "figure":
+            self.figure, self.axis = self.__initialize_figure()
+            self.__initialize_artists()
+
+    def update(
+        self,
+        frame: np.ndarray,
+        landmarks: NormalizedLandmarkList,
+        joints: list[Joint],
+        angles: list[Angle],
+        progress: float,
+        repetitions: int,
+        state: str,
+        feedback: list[str] | None = None,
+    ) -> None:
+        if self.mode == "headless":
+            return
+        self.draw_landmarks(frame, landmarks, mp.solutions.pose.POSE_CONNECTIONS)
+        if self.mode == "figure":
+            self.update_figure(joints, angles, progress, repetitions, state, feedback)
+        else:
+            self.draw_overlay(frame, angles, progress, repetitions, state, feedback)
 
     @staticmethod
     def __initialize_figure(
@@ -40,14 +82,29 @@ class Visualizer:
             plt.get_current_fig_manager().window.wm_geometry("800x600+800-400")
 
         ax.view_init(elev=elev, azim=azim)
+        ax.set_xlim3d(*X_LIM)
+        ax.set_ylim3d(*Y_LIM)
+        ax.set_zlim3d(*Z_LIM)
+        plt.show(block=False)
         return fig, ax
 
-    def __plot_joints(self, joints: list[Joint]) -> None:
-        self.axis.scatter3D(
-            xs=[joint.x for joint in joints],
-            ys=[joint.y for joint in joints],
-            zs=[joint.y for joint in joints],
+    def __initialize_artists(self) -> None:
+        (self.joints_artist,) = self.axis.plot([], [], [], "o", linestyle="")
+        # Collections start with a degenerate segment, because autoscaling of an
+        # empty 3D collection fails on recent matplotlib
+        self.connections_artist = Line3DCollection([EMPTY_SEGMENT], colors="tab:orange")
+        self.axis.add_collection3d(self.connections_artist)
+
+        self.axis.add_collection3d(Poly3DCollection([PROGRESS_BAR_VERTICES], alpha=0.5))
+        self.progress_artist = Line3DCollection(
+            [EMPTY_SEGMENT], colors="k", linewidths=4
         )
+        self.axis.add_collection3d(self.progress_artist)
+
+        self.repetitions_artist = self.__add_text("", x=1.2, y=-1.2, z=0)
+        self.instruction_artist = self.__add_text("", x=0, y=-1.2, z=0)
+        self.feedback_artist = self.__add_text("", x=0, y=1.2, z=0)
+        self.angle_artists = []
 
     def update_figure(
         self,
@@ -56,24 +113,72 @@ class Visualizer:
         progress: float,
         repetitions: int,
         state: str,
+        feedback: list[str] | None = None,
     ) -> None:
-        self.__restart_figure()
         visible_joints = self.__prepare_joints_for_plotting(joints)
+        coordinates = np.array(
+            [(joint.x, joint.y, joint.z) for joint in visible_joints]
+        ).reshape(-1, 3)
+        self.joints_artist.set_data_3d(*coordinates.T)
+        self.connections_artist.set_segments(
+            self.__get_connection_segments(visible_joints)
+        )
+        self.progress_artist.set_segments(
+            [[[1.2, -1 + 2 * progress, 0.2], [2, -1 + 2 * progress, 0.2]]]
+        )
 
-        self.__plot_joints(visible_joints)
-        self.__plot_connections(visible_joints)
-        self.__plot_progress_bar(progress)
-        self.__add_text(f"Reps: {repetitions}", x=1.2, y=-1.2, z=0)
-        self.__add_text(INSTRUCTION_MAPPER[state], x=0, y=-1.2, z=0)
+        self.repetitions_artist.set_text(f"Reps: {repetitions}")
+        self.instruction_artist.set_text(INSTRUCTION_MAPPER[state])
+        self.feedback_artist.set_text("\n".join(feedback or []))
+        self.feedback_artist.set_visible(bool(feedback))
 
-        for idx, angle in enumerate(angles):
-            angle_text = f"{angle.name}: {angle.value:.2f}°"
+        for idx in range(len(self.angle_artists), len(angles)):
             x_position = X_LIM[0] - 1
             y_position = idx * 0.2 * Y_LIM[1] - 1
             z_position = Z_LIM[0]
-            self.__add_text(angle_text, x_position, y_position, z_position)
+            self.angle_artists.append(
+                self.__add_text("", x_position, y_position, z_position)
+            )
+        for artist, angle in zip(self.angle_artists, angles):
+            artist.set_text(f"{angle.name}: {angle.value:.2f}°")
 
-        plt.pause(0.001)
+        self.figure.canvas.draw_idle()
+        self.figure.canvas.flush_events()
+
+    @staticmethod
+    def draw_overlay(
+        frame: np.ndarray,
+        angles: list[Angle],
+        progress: float,
+        repetitions: int,
+        state: str,
+        feedback: list[str] | None = None,
+    ) -> None:
+        """
+        Draw progress bar, counters, angles and feedback directly onto the frame
+        """
+        bar_width, bar_height = OVERLAY_PROGRESS_BAR_SIZE
+        bar_x = frame.shape[1] - OVERLAY_MARGIN - bar_width
+        bar_top = OVERLAY_MARGIN
+        bar_bottom = bar_top + bar_height
+        progress_y = int(bar_bottom - progress * bar_height)
+        cv2.rectangle(
+            frame, (bar_x, bar_top), (bar_x + bar_width, bar_bottom), JOINTS_COLOR, 2
+        )
+        cv2.rectangle(
+            frame,
+            (bar_x, progress_y),
+            (bar_x + bar_width, bar_bottom),
+            JOINTS_COLOR,
+            -1,
+        )
+
+        lines = [f"Reps: {repetitions}", INSTRUCTION_MAPPER[state]]
+        lines += [f"{angle.name}: {angle.value:.2f}" for angle in angles]
+        for idx, line in enumerate(lines, 1):
+            Visualizer.__put_text(frame, line, idx, OVERLAY_TEXT_COLOR)
+        for idx, line in enumerate(feedback or [], len(lines) + 2):
+            Visualizer.__put_text(frame, line, idx, OVERLAY_FEEDBACK_COLOR)
 
     @staticmethod
     def draw_landmarks(
@@ -89,40 +194,15 @@ class Visualizer:
             ),
         )
 
-    def __plot_connections(self, joints: list[Joint]) -> None:
-        for connection in self.connections:
-            joint_start, joint_end = connection
-            try:
-                start_coords = next(
-                    (joint.x, joint.y, joint.z)
-                    for joint in joints
-                    if joint.id == joint_start
-                )
-                end_coords = next(
-                    (joint.x, joint.y, joint.z)
-                    for joint in joints
-                    if joint.id == joint_end
-                )
-            except StopIteration:
-                continue
-
-            self.axis.plot(
-                xs=[start_coords[0], end_coords[0]],
-                ys=[start_coords[1], end_coords[1]],
-                zs=[start_coords[2], end_coords[2]],
-            )
-
-    def __plot_progress_bar(self, progress: float):
-        poly_bar = Poly3DCollection([PROGRESS_BAR_VERTICES], alpha=0.5)
-        self.axis.add_collection3d(poly_bar)
-
-        line_vertices = np.array(
-            [[1.2, -1 + 2 * progress, 0.2], [2, -1 + 2 * progress, 0.2]]
-        )
-        line = Line3DCollection([line_vertices], colors="k", linewidths=4)
-        self.axis.add_collection3d(line)
+    def __get_connection_segments(self, joints: list[Joint]) -> list[list[tuple]]:
+        coordinates = {joint.id: (joint.x, joint.y, joint.z) for joint in joints}
+        return [
+            [coordinates[joint_start], coordinates[joint_end]]
+            for joint_start, joint_end in self.connections
+            if joint_start in coordinates and joint_end in coordinates
+        ]
 
-    def __add_text(self, text: str, x: float, y: float, z: float, **kwargs) -> None:
+    def __add_text(self, text: str, x: float, y: float, z: float, **kwargs):
         angles_text_kwargs = {
             "s": text,
             "x": x,
@@ -132,14 +212,21 @@ class Visualizer:
             "style": "italic",
             "bbox": {"facecolor": "white", "alpha": 0.7, "pad": 5},
         }
-        self.axis.text3D(**angles_text_kwargs, **kwargs)
+        return self.axis.text3D(**angles_text_kwargs, **kwargs)
 
-    def __restart_figure(self) -> None:
-        self.axis.clear()
-        self.axis.set_xlim3d(*X_LIM)
-        self.axis.set_ylim3d(*Y_LIM)
-        self.axis.set_zlim3d(*Z_LIM)
+    @staticmethod
+    def __put_text(frame: np.ndarray, text: str, line: int, color: tuple) -> None:
+        cv2.putText(
+            frame,
+            text,
+            (OVERLAY_MARGIN, OVERLAY_MARGIN + line * OVERLAY_LINE_HEIGHT),
+            OVERLAY_FONT,
+            OVERLAY_FONT_SCALE,
+            color,
+            1,
+            cv2.LINE_AA,
+        )
 
     @staticmethod
     def __prepare_joints_for_plotting(joints: list[Joint]) -> list[Joint]:
-        return [joint for joint in joints if joint.visibility > 0.1]
+        return [joint for joint in joints if joint.visibility > VISIBILITY_THRESHOLD]